@@ -1,238 +1,31 @@
 import streamlit as st
-import random
-from collections import Counter
-from PIL import Image, ImageDraw
-import io
-import streamlit_option_menu   
-st.set_page_config(layout="wide")
-class VegasGame:
-    def __init__(self, num_players):
-        self.num_players = num_players
-        self.players = [Player(i) for i in range(num_players)]
-        self.casinos = [Casino(i) for i in range(1, 7)]
-        self.current_round = 1
-        self.start_player = 0
-        self.current_player = 0
-        self.dice_rolled = False
-        self.setup_game()
-
-    def setup_game(self):
-        money_cards = [10000] * 6 + [20000] * 8 + [30000] * 8 + [40000] * 6 + \
-                      [50000] * 6 + [60000] * 5 + [70000] * 5 + [80000] * 5 + [90000] * 5
-        random.shuffle(money_cards)
-        for casino in self.casinos:
-            casino.add_money(money_cards)
-
-    def play_round(self):
-        player = self.players[self.current_player]
-        if player.dice and not self.dice_rolled:
-            player.roll_dice()
-            self.dice_rolled = True
-            return True
-        return False
-
-    def place_dice(self, casino_index):
-        player = self.players[self.current_player]
-        regular_count = player.current_roll.count(casino_index)
-        dealer_count = player.current_dealer_roll.count(casino_index)
-        
-        if regular_count > 0 or dealer_count > 0:
-            # 일반 주사위 배치
-            for _ in range(regular_count):
-                player.current_roll.remove(casino_index)
-                player.dice -= 1
-                self.casinos[casino_index - 1].add_dice(player.id, 1)
-            
-            # 딜러 주사위 배치
-            for _ in range(dealer_count):
-                player.current_dealer_roll.remove(casino_index)
-                player.dealer_dice -= 1
-                self.casinos[casino_index - 1].add_dealer_dice(1)
-            
-            self.next_player()  # 배팅 후 바로 다음 플레이어로 넘어감
-            return True
-        return False
-
-    def next_player(self):
-        self.current_player = (self.current_player + 1) % self.num_players
-        while self.players[self.current_player].dice == 0 and self.players[self.current_player].dealer_dice == 0:
-            self.current_player = (self.current_player + 1) % self.num_players
-            if self.current_player == self.start_player:
-                self.end_round()
-                break
-        self.dice_rolled = False
-
-    def end_round(self):
-        winnings = {player.id: [] for player in self.players}
-        for casino in self.casinos:
-            casino_winnings = casino.distribute_money(self.players)
-            for player_id, amount in casino_winnings.items():
-                winnings[player_id].append((casino.number, amount))
-        
-        for player in self.players:
-            player.reset_dice()
-            player.dealer_dice = 4
-        
-        money_cards = [10000] * 6 + [20000] * 8 + [30000] * 8 + [40000] * 6 + \
-                      [50000] * 6 + [60000] * 5 + [70000] * 5 + [80000] * 5 + [90000] * 5
-        random.shuffle(money_cards)
-        
-        for casino in self.casinos:
-            casino.reset(money_cards)
-        
-        self.current_round += 1
-        self.start_player = (self.start_player + 1) % self.num_players
-        self.current_player = self.start_player
-        
-        return winnings
-
-    def get_winner(self):
-        return max(self.players, key=lambda p: (p.money, p.card_count))
-
-class Player:
-    def __init__(self, id):
-        self.id = id
-        self.dice = 8
-        self.dealer_dice = 4
-        self.money = 0
-        self.card_count = 0
-        self.current_roll = []
-        self.current_dealer_roll = []
-
-    def roll_dice(self):
-        self.current_roll = [random.randint(1, 6) for _ in range(self.dice)]
-        self.current_roll.sort()
-        self.current_dealer_roll = [random.randint(1, 6) for _ in range(self.dealer_dice)]
-        self.current_dealer_roll.sort()
-
-    def get_dice_count(self):
-        return Counter(self.current_roll)
-
-    def get_dealer_dice_count(self):
-        return Counter(self.current_dealer_roll)
-
-    def reset_dice(self):
-        self.dice = 8
-        self.current_roll = []
-
-    def add_money(self, amount):
-        self.money += amount
-        self.card_count += 1
-
-class Casino:
-    def __init__(self, number):
-        self.number = number
-        self.dice = {}
-        self.dealer_dice = 0  # 딜러 주사위 개수 초기화
-        self.money = []
-
-    def add_dice(self, player_id, count):
-        self.dice[player_id] = self.dice.get(player_id, 0) + count
-
-    def add_dealer_dice(self, count):
-        self.dealer_dice += count  # 딜러 주사위 개수 증가
-
-    def add_money(self, money_cards):
-        total = 0
-        while total < 50000 and money_cards:
-            card = money_cards.pop()
-            self.money.append(card)
-            total += card
-
-    def distribute_money(self, players):
-        dice_counts = sorted(self.dice.items(), key=lambda x: x[1], reverse=True)
-        
-        if self.dealer_dice >= max([count for _, count in dice_counts], default=0):
-            return {}
+from engine import VegasGame, DEALER
+from mcts import MCTSPlayer, play_ai_turn, search_summary
+from odds import placement_hint
+from opening_book import book_move
+from state import GameState
+from history import History
+from winrate import WinRateEstimator, process_pool
+import assets
+import metrics
+from assets import ASSETS, casino_png, dealer_dice_png, dice_png, money_png
+metrics.setup()
+metrics.instrument(assets, "render", "assets_render")
+
+
+@st.cache_resource
+def simulation_pool():
+    # 모든 세션이 함께 쓰는 워커 프로세스
+    return process_pool(2)
 
-        unique_counts = {}
-        for player_id, count in dice_counts:
-            if count > self.dealer_dice and count not in unique_counts:
-                unique_counts[count] = player_id
-        
-        winnings = {}
-        for count, player_id in sorted(unique_counts.items(), reverse=True):
-            if self.money:
-                amount = self.money.pop(0)
-                players[player_id].add_money(amount)
-                winnings[player_id] = amount
-            else:
-                winnings[player_id] = 0
-        
-        return winnings
-
-    def reset(self, money_cards=None):
-        self.dice.clear()
-        self.dealer_dice = 0  # 딜러 주사위 개수 초기화
-        self.money.clear()
-        if money_cards:
-            self.add_money(money_cards)
-
-def create_dice_image(number):
-    size = 50
-    dot_size = 6
-    image = Image.new('RGB', (size, size), color='white')
-    draw = ImageDraw.Draw(image)
-    draw.rectangle([0, 0, size-1, size-1], outline='black')
-
-    dots = {
-        1: [(25, 25)],
-        2: [(17, 17), (33, 33)],
-        3: [(17, 17), (25, 25), (33, 33)],
-        4: [(17, 17), (17, 33), (33, 17), (33, 33)],
-        5: [(17, 17), (17, 33), (25, 25), (33, 17), (33, 33)],
-        6: [(17, 17), (17, 25), (17, 33), (33, 17), (33, 25), (33, 33)]
-    }
-
-    for dot in dots[number]:
-        draw.ellipse([dot[0]-dot_size//2, dot[1]-dot_size//2,
-                      dot[0]+dot_size//2, dot[1]+dot_size//2], fill='black')
-
-    return image
-
-def create_dealer_dice_image(number):
-    size = 50
-    dot_size = 6
-    image = Image.new('RGB', (size, size), color='lightgray')
-    draw = ImageDraw.Draw(image)
-    draw.rectangle([0, 0, size-1, size-1], outline='black')
-
-    dots = {
-        1: [(25, 25)],
-        2: [(17, 17), (33, 33)],
-        3: [(17, 17), (25, 25), (33, 33)],
-        4: [(17, 17), (17, 33), (33, 17), (33, 33)],
-        5: [(17, 17), (17, 33), (25, 25), (33, 17), (33, 33)],
-        6: [(17, 17), (17, 25), (17, 33), (33, 17), (33, 25), (33, 33)]
-    }
-
-    for dot in dots[number]:
-        draw.ellipse([dot[0]-dot_size//2, dot[1]-dot_size//2,
-                      dot[0]+dot_size//2, dot[1]+dot_size//2], fill='red')
-
-    return image
-
-def create_casino_image(number):
-    image = Image.new('RGB', (100, 100), color='lightblue')
-    draw = ImageDraw.Draw(image)
-    draw.rectangle([0, 0, 99, 99], outline='black')
-    draw.text((35, 40), f"Casino {number}", fill='black')
-    return image
-
-def create_money_image():
-    image = Image.new('RGB', (30, 20), color='lightgreen')
-    draw = ImageDraw.Draw(image)
-    draw.rectangle([0, 0, 29, 19], outline='black')
-    draw.text((10, 5), "$", fill='black')
-    return image
-
-def image_to_bytes(img):
-    buf = io.BytesIO()
-    img.save(buf, format='PNG')
-    return buf.getvalue()
 
 def main():
+    # 화면 설정은 import 할 때가 아니라 실행할 때 한다 (벤치마크나 다른 모듈이 import 해도 Streamlit 명령이 나가지 않게)
+    st.set_page_config(layout="wide")
+    phase = metrics.phases("app")  # rerun 단계별 시간 (VEGAS_METRICS=1 일 때만)
     st.title("라스베가스 게임")
+    cache = ASSETS.stats()
+    st.sidebar.caption(f"이미지 캐시: 적중 {cache['hits']}, 생성 {cache['misses']}")
     
     if st.checkbox("게임 설명"):
         st.write("""
@@ -249,12 +42,37 @@ def main():
 
     if st.session_state.game is None:
         num_players = st.selectbox("플레이어 수 선택:", options=[2, 3, 4, 5])
+        ai_count = st.selectbox("AI 플레이어 수 선택:", options=list(range(num_players + 1)))
         if st.button("게임 시작"):
-            st.session_state.game = VegasGame(num_players)
+            st.session_state.game = VegasGame(num_players, DEALER)
+            st.session_state.history = History(st.session_state.game)
+            # 뒤쪽 자리부터 AI 가 맡는다
+            st.session_state.ai_players = set(range(num_players - ai_count, num_players))
+            st.session_state.ai = MCTSPlayer(time_budget=0.2)
+            st.session_state.ai_message = None
+            st.session_state.win_rate = WinRateEstimator(simulation_pool())
             st.rerun()
 
     else:
         game = st.session_state.game
+
+        # 라운드 결과를 보는 동안에는 AI 도 기다린다
+        if not game.is_over() and not st.session_state.round_ended and \
+                game.current_player in st.session_state.get("ai_players", ()):
+            ai = st.session_state.ai
+            player_id = game.current_player
+            round_before = game.current_round
+            face = play_ai_turn(game, ai, st.session_state.history)
+            if face is not None:
+                st.session_state.ai_message = (f"AI 플레이어 {player_id + 1}: {face}번 카지노에 배치 "
+                                               f"({search_summary(ai.last_stats)})")
+                if game.current_round != round_before:
+                    st.session_state.round_ended = True
+                st.rerun()
+
+        phase("ai")
+        if st.session_state.get("ai_message"):
+            st.info(st.session_state.ai_message)
         
         st.write(f"라운드: {game.current_round}, 현재 플레이어: {game.current_player + 1}")
         current_player = game.players[game.current_player]
@@ -262,61 +80,16 @@ def main():
 
         a, b = st.columns(2)
         with a:
-            cols = st.columns(3)
-            for i, casino in enumerate(game.casinos):
-                with cols[i % 3]:
-                    st.image(image_to_bytes(create_casino_image(casino.number)))
-                    money_str = ", ".join([f"${m}" for m in casino.money])
-                    st.image(image_to_bytes(create_money_image()))
-                    st.write(f"돈: {money_str}")
-                    dice_str = ", ".join([f"P{p+1}: {c}" for p, c in casino.dice.items()])
-                    st.write(f"주사위: {dice_str}")
-                    st.write(f"딜러 주사위: {casino.dealer_dice}")
+            casino_panels(game)
+        phase("casinos")
         with b:
-            st.write("플레이어 돈:")
-            for player in game.players:
-                st.write(f"플레이어 {player.id + 1}: ${player.money}")
-
-            if st.button("주사위 굴리기"):
-                if not game.dice_rolled:
-                    if game.play_round():
-                        st.rerun()
-                else:
-                    st.warning("이미 주사위를 굴렸습니다. 주사위를 배치해주세요.")
-
-            dice_count = current_player.get_dice_count()
-            dealer_dice_count = current_player.get_dealer_dice_count()
-            
-            st.write("일반 주사위:")
-            cols = st.columns(6)
-            for i in range(6):
-                with cols[i]:
-                    st.image(image_to_bytes(create_dice_image(i+1)))
-                    st.write(f"{i+1}: {dice_count[i+1]}")
-            
-            st.write("딜러 주사위:")
-            cols = st.columns(6)
-            for i in range(6):
-                with cols[i]:
-                    st.image(image_to_bytes(create_dealer_dice_image(i+1)))
-                    st.write(f"{i+1}: {dealer_dice_count[i+1]}")
-
-            available_dice = sorted(set(current_player.current_roll + current_player.current_dealer_roll))
-            dice_choice = st.selectbox("배치할 주사위 선택 (카지노 번호와 동일):", options=available_dice)
-            
-            regular_count = current_player.current_roll.count(dice_choice)
-            dealer_count = current_player.current_dealer_roll.count(dice_choice)
-            
-            st.write(f"선택한 주사위 {dice_choice}의 개수: 일반 주사위 {regular_count}개, 딜러 주사위 {dealer_count}개")
-            
-            if st.button("주사위 배치"):
-                if game.place_dice(dice_choice):
-                    if all(player.dice == 0 and player.dealer_dice == 0 for player in game.players):
-                        st.session_state.round_ended = True
-                    st.rerun()
+            player_panel(game)
+            win_rates()
+            phase("players")
+            dice_tray()
 
             if st.session_state.round_ended:
-                winnings = game.end_round()
+                winnings = game.last_winnings
                 st.write("라운드 결과:")
                 for player_id, player_winnings in winnings.items():
                     player = game.players[player_id]
@@ -326,17 +99,155 @@ def main():
                             st.write(f"  카지노 {casino_number}에서 ${amount} 획득")
                     st.write(f"  총 잔액: ${player.money}")
                 
-                st.session_state.round_ended = False
-                
-                if game.current_round == 5:
+                if game.is_over():
                     winner = game.get_winner()
                     st.write(f"게임 종료! 승자: 플레이어 {winner.id + 1} (${winner.money}, 카드 {winner.card_count}장)")
                     if st.button("새 게임 시작"):
                         st.session_state.game = None
+                        st.session_state.round_ended = False
                         st.rerun()
                 else:
                     if st.button("다음 라운드 시작"):
+                        st.session_state.round_ended = False
                         st.rerun()
 
+
+def casino_panels(game):
+    cols = st.columns(3)
+    for i, casino in enumerate(game.casinos):
+        with cols[i % 3]:
+            st.image(casino_png(casino.number))
+            money_str = ", ".join([f"${m}" for m in casino.money])
+            st.image(money_png())
+            st.write(f"돈: {money_str}")
+            dice_str = ", ".join([f"P{p+1}: {c}" for p, c in casino.dice.items()])
+            st.write(f"주사위: {dice_str}")
+            st.write(f"딜러 주사위: {casino.dealer_dice}")
+
+
+def signed_money(amount):
+    # -$5,000 / +$5,000 처럼 부호를 $ 앞에 붙인다. 반올림해서 0 이면 부호를 붙이지 않는다
+    value = round(amount)
+    return f"{'-' if value < 0 else '+' if value > 0 else ''}${abs(value):,}"
+
+
+def player_panel(game):
+    st.write("플레이어 돈:")
+    for player in game.players:
+        st.write(f"플레이어 {player.id + 1}: ${player.money}")
+
+
+def win_rates():
+    # 승률은 백그라운드 워커가 묶음을 돌리는 동안에만 조각을 1초마다 다시 그린다.
+    # 타이머는 전체 실행 때 정해지므로, 조각 실행 중에 계산이 끝나면 전체를 한 번 다시 실행해 타이머를 끈다
+    game = st.session_state.game
+    estimator = st.session_state.get("win_rate")
+    if game is None or estimator is None:
+        return
+    if game.is_over():
+        estimator.cancel()
+        return
+    estimator.estimate(game)  # 판이 바뀌었으면 여기서 계산을 시작한다
+    st.session_state.win_rate_ticking = estimator.busy()
+    st.fragment(win_rate_panel, run_every=1.0 if st.session_state.win_rate_ticking else None)()
+
+
+def win_rate_panel():
+    game = st.session_state.game
+    estimator = st.session_state.win_rate
+    probabilities, playouts = estimator.estimate(game)
+    if st.session_state.win_rate_ticking and not estimator.busy():
+        st.session_state.win_rate_ticking = False
+        st.rerun()
+    if probabilities is None:
+        st.caption("승률 계산 중...")
+        return
+    st.write(f"예상 승률 ({playouts:,}회 시뮬레이션):")
+    for player_id, p in enumerate(probabilities):
+        st.progress(p, text=f"플레이어 {player_id + 1}: {p:.0%}")
+
+
+# 굴리기와 주사위 선택은 이 조각만 다시 실행한다. 카지노와 플레이어 돈은 배치할 때만 바뀌므로
+# 배치한 뒤에만 전체 스크립트를 다시 실행한다.
+@st.fragment
+def dice_tray():
+    phase = metrics.phases("app")
+    game = st.session_state.game
+    current_player = game.players[game.current_player]
+    # 라운드 결과를 보는 동안이나 AI 차례에는 사람이 굴리거나 배치할 수 없다
+    locked = (game.is_over() or st.session_state.round_ended
+              or game.current_player in st.session_state.get("ai_players", ()))
+    # 굴린 결과는 바로 아래에서 그리므로 다시 실행할 필요가 없다
+    if st.button("주사위 굴리기", disabled=locked):
+        if game.dice_rolled:
+            st.warning("이미 주사위를 굴렸습니다. 주사위를 배치해주세요.")
+        else:
+            st.session_state.history.play_round()
+
+    dice_count = current_player.get_dice_count()
+    dealer_dice_count = current_player.get_dealer_dice_count()
+
+    st.write("일반 주사위:")
+    cols = st.columns(6)
+    for i in range(6):
+        with cols[i]:
+            st.image(dice_png(i+1))
+            st.write(f"{i+1}: {dice_count[i+1]}")
+
+    st.write("딜러 주사위:")
+    cols = st.columns(6)
+    for i in range(6):
+        with cols[i]:
+            st.image(dealer_dice_png(i+1))
+            st.write(f"{i+1}: {dealer_dice_count[i+1]}")
+    phase("dice_tray")
+
+    available_dice = sorted(set(current_player.current_roll + current_player.current_dealer_roll))
+    hints = placement_hint(game) if game.dice_rolled else {}
+    dice_choice = st.selectbox("배치할 주사위 선택 (카지노 번호와 동일):", options=available_dice,
+                               format_func=lambda f: f"{f} (예상 수익 {signed_money(hints[f])})" if f in hints else str(f))
+    if hints:
+        book = book_move(GameState.from_game(game))
+        if book is not None:
+            st.caption(f"추천: {book}번 카지노 (오프닝 북)")
+        else:
+            best = max(hints, key=hints.get)
+            st.caption(f"추천: {best}번 카지노 (예상 수익 {signed_money(hints[best])})")
+
+    regular_count = current_player.current_roll.count(dice_choice)
+    dealer_count = current_player.current_dealer_roll.count(dice_choice)
+
+    st.write(f"선택한 주사위 {dice_choice}의 개수: 일반 주사위 {regular_count}개, 딜러 주사위 {dealer_count}개")
+
+    if st.button("주사위 배치", disabled=locked):
+        round_before = game.current_round
+        if st.session_state.history.place_dice(dice_choice):
+            # 마지막 주사위가 놓이면 엔진이 라운드를 정산한다
+            if game.current_round != round_before:
+                st.session_state.round_ended = True
+            st.rerun()
+    undo_redo(game)
+    phase("controls")
+
+
+def undo_redo(game):
+    # AI 가 둔 수는 사람 차례가 될 때까지 함께 되돌리고 다시 둔다
+    history = st.session_state.history
+    ai_players = st.session_state.get("ai_players", ())
+    undo_col, redo_col = st.columns(2)
+    if undo_col.button("되돌리기", disabled=not history.can_undo()):
+        while history.undo() is not None and game.current_player in ai_players:
+            pass
+        st.session_state.round_ended = False
+        st.session_state.ai_message = None
+        st.rerun()
+    if redo_col.button("다시 하기", disabled=not history.can_redo()):
+        round_before = game.current_round
+        while history.redo() is not None and game.current_player in ai_players and history.can_redo():
+            pass
+        st.session_state.round_ended = game.current_round != round_before
+        st.rerun()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,120 @@
+import io
+import threading
+from PIL import Image, ImageDraw
+
+# 보드 그림은 (종류, 눈/번호, 색 구성, 크기) 마다 한 번만 그리고 PNG 로 인코딩해 프로세스 전체에서 공유한다.
+SCHEMES = {
+    "default": {
+        "dice": ("white", "black"),
+        "dealer_dice": ("lightgray", "red"),
+        "casino": ("lightblue", "black"),
+        "money": ("lightgreen", "black"),
+    },
+}
+
+# 50px 주사위 기준 눈 위치
+DOTS = {
+    1: [(25, 25)],
+    2: [(17, 17), (33, 33)],
+    3: [(17, 17), (25, 25), (33, 33)],
+    4: [(17, 17), (17, 33), (33, 17), (33, 33)],
+    5: [(17, 17), (17, 33), (25, 25), (33, 17), (33, 33)],
+    6: [(17, 17), (17, 25), (17, 33), (33, 17), (33, 25), (33, 33)]
+}
+
+DEFAULT_SIZES = {"dice": 50, "dealer_dice": 50, "casino": 100, "money": (30, 20)}
+
+
+def draw_dice(number, background, dot_color, size=50):
+    dot_size = 6 * size // 50
+    image = Image.new('RGB', (size, size), color=background)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, size-1, size-1], outline='black')
+    for x, y in DOTS[number]:
+        x, y = x * size // 50, y * size // 50
+        draw.ellipse([x-dot_size//2, y-dot_size//2, x+dot_size//2, y+dot_size//2], fill=dot_color)
+    return image
+
+
+def draw_casino(number, background, text_color, size=100):
+    image = Image.new('RGB', (size, size), color=background)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, size-1, size-1], outline='black')
+    draw.text((35 * size // 100, 40 * size // 100), f"Casino {number}", fill=text_color)
+    return image
+
+
+def draw_money(background, text_color, size=(30, 20)):
+    width, height = size
+    image = Image.new('RGB', (width, height), color=background)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, width-1, height-1], outline='black')
+    draw.text((width // 3, height // 4), "$", fill=text_color)
+    return image
+
+
+def image_to_bytes(img):
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def render(kind, number, scheme, size):
+    background, foreground = SCHEMES[scheme][kind]
+    if kind in ("dice", "dealer_dice"):
+        return draw_dice(number, background, foreground, size)
+    if kind == "casino":
+        return draw_casino(number, background, foreground, size)
+    if kind == "money":
+        return draw_money(background, foreground, size)
+    raise ValueError(f"unknown asset kind: {kind}")
+
+
+class AssetCache:
+    def __init__(self):
+        self._png = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, number=None, scheme="default", size=None):
+        key = (kind, number, scheme, size or DEFAULT_SIZES[kind])
+        png = self._png.get(key)
+        if png is not None:
+            self.hits += 1
+            return png
+        with self._lock:
+            png = self._png.get(key)
+            if png is None:
+                self.misses += 1
+                png = self._png[key] = image_to_bytes(render(*key))
+            else:
+                self.hits += 1
+        return png
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._png)}
+
+    def clear(self):
+        with self._lock:
+            self._png.clear()
+            self.hits = self.misses = 0
+
+
+ASSETS = AssetCache()
+
+
+def dice_png(number, scheme="default", size=None):
+    return ASSETS.get("dice", number, scheme, size)
+
+
+def dealer_dice_png(number, scheme="default", size=None):
+    return ASSETS.get("dealer_dice", number, scheme, size)
+
+
+def casino_png(number, scheme="default", size=None):
+    return ASSETS.get("casino", number, scheme, size)
+
+
+def money_png(scheme="default", size=None):
+    return ASSETS.get("money", None, scheme, size)
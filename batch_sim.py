@@ -0,0 +1,221 @@
+import argparse
+import time
+import numpy as np
+from engine import CLASSIC, DEALER, MONEY_CARDS
+
+# engine.VegasGame 과 같은 규칙을 (게임, 플레이어, 카지노) 배열로 N 게임 동시에 진행한다.
+NUM_CASINOS = 6
+CARD_TABLE = np.array(MONEY_CARDS, dtype=np.int32)
+NOT_PLACED = np.iinfo(np.int16).max
+
+
+def random_policy(sim, games, regular, dealer, legal):
+    scores = sim.rng.random(legal.shape, dtype=np.float32)
+    return np.where(legal, scores, -1.0).argmax(1)
+
+
+def greedy_policy(sim, games, regular, dealer, legal):
+    # 한 번에 가장 많은 주사위를 내려놓을 수 있는 면을 고른다
+    return (regular + dealer).argmax(1)
+
+
+class BatchVegas:
+    def __init__(self, num_games, num_players, variant=DEALER, seed=None, log=None):
+        if not 2 <= num_players <= 5:
+            raise ValueError("num_players must be between 2 and 5")
+        self.num_games = num_games
+        self.num_players = num_players
+        self.variant = variant
+        self.num_dice = variant.dice_per_player
+        self.num_dealer_dice = variant.dealer_dice
+        self.rounds = variant.rounds
+        # 가장 작은 지폐만으로 자금을 채우는 경우가 카지노당 최대 장수다
+        self.max_casino_cards = -(-variant.casino_funding // min(MONEY_CARDS))
+        self.rng = np.random.default_rng(seed)
+        self.log = log  # simstore.ChunkWriter 처럼 라운드와 게임이 끝날 때 배열을 받아 적는 객체
+        self._regular_slots = np.arange(self.num_dice)
+        self._dealer_slots = np.arange(self.num_dealer_dice)
+        self.reset()
+
+    def reset(self):
+        g, p = self.num_games, self.num_players
+        self.dice = np.empty((g, p), dtype=np.int16)
+        self.dealer_dice = np.empty((g, p), dtype=np.int16)
+        self.placed = np.empty((g, p, NUM_CASINOS), dtype=np.int16)
+        # 카지노별 첫 배치 순서: 동점일 때 먼저 놓은 플레이어가 이긴다 (Casino.dice 의 삽입 순서)
+        self.first_placed = np.empty((g, p, NUM_CASINOS), dtype=np.int16)
+        self.dealer_placed = np.empty((g, NUM_CASINOS), dtype=np.int16)
+        # 마지막 칸은 항상 0 원: 카드보다 순위가 많은 플레이어가 가리킨다
+        self.casino_money = np.zeros((g, NUM_CASINOS, self.max_casino_cards + 1), dtype=np.int32)
+        self.money = np.empty((g, p), dtype=np.int64)
+        self.card_count = np.empty((g, p), dtype=np.int16)
+        self.current_round = np.empty(g, dtype=np.int8)
+        self.start_player = np.empty(g, dtype=np.int8)
+        self.current_player = np.empty(g, dtype=np.int8)
+        self.turn = np.empty(g, dtype=np.int16)
+        self.done = np.empty(g, dtype=bool)
+        self.restart(np.arange(g))
+
+    def restart(self, games):
+        # 고른 게임만 새 게임으로 되돌린다. 배열은 새로 만들지 않는다
+        self.dice[games] = self.num_dice
+        self.dealer_dice[games] = self.num_dealer_dice
+        self.placed[games] = 0
+        self.first_placed[games] = NOT_PLACED
+        self.dealer_placed[games] = 0
+        self.money[games] = 0
+        self.card_count[games] = 0
+        self.current_round[games] = 1
+        self.start_player[games] = 0
+        self.current_player[games] = 0
+        self.turn[games] = 0
+        self.done[games] = False
+        self._deal(games)
+
+    def _deal(self, games):
+        n = len(games)
+        deck = self.rng.permuted(np.broadcast_to(CARD_TABLE, (n, len(CARD_TABLE))), axis=1)
+        cards = np.zeros((n, NUM_CASINOS, self.max_casino_cards + 1), dtype=np.int32)
+        rows = np.arange(n)
+        top = np.zeros(n, dtype=np.intp)
+        for c in range(NUM_CASINOS):
+            total = np.zeros(n, dtype=np.int64)
+            for k in range(self.max_casino_cards):
+                need = (total < self.variant.casino_funding) & (top < len(CARD_TABLE))
+                card = deck[rows, np.minimum(top, len(CARD_TABLE) - 1)] * need
+                cards[:, c, k] = card
+                total += card
+                top += need
+        # Casino.money 처럼 큰 지폐부터 정렬한다. 빈 칸(0)은 뒤로 밀린다
+        self.casino_money[games] = -np.sort(-cards, axis=2)
+
+    def _roll(self, regular_left, dealer_left):
+        # 일반 주사위는 0-5, 딜러 주사위는 6-11 칸, 남지 않은 주사위는 12 칸에 떨어뜨려 한 번에 센다
+        n = regular_left.size
+        width = self.num_dice + self.num_dealer_dice
+        faces = self.rng.integers(0, 6, size=(n, width), dtype=np.int8)
+        faces[:, self.num_dice:] += 6
+        faces[:, :self.num_dice][self._regular_slots >= regular_left[:, None]] = 12
+        faces[:, self.num_dice:][self._dealer_slots >= dealer_left[:, None]] = 12
+        offsets = (np.arange(n) * 13)[:, None] + faces
+        hist = np.bincount(offsets.ravel(), minlength=13 * n).reshape(n, 13).astype(np.int16)
+        return hist[:, :6], hist[:, 6:12]
+
+    def step(self, policy=random_policy):
+        games = np.flatnonzero(~self.done)
+        if not games.size:
+            return False
+        self.play(games, policy)
+        return True
+
+    def roll(self, games):
+        # 고른 게임의 현재 플레이어가 굴린 (일반, 딜러) 눈별 개수
+        players = self.current_player[games].astype(np.intp)
+        return self._roll(self.dice[games, players], self.dealer_dice[games, players])
+
+    def play(self, games, policy=random_policy):
+        regular, dealer = self.roll(games)
+        legal = (regular + dealer) > 0
+        faces = np.asarray(policy(self, games, regular, dealer, legal), dtype=np.intp)
+        self.place(games, faces, regular, dealer)
+
+    def place(self, games, faces, regular, dealer):
+        rows = np.arange(games.size)
+        players = self.current_player[games].astype(np.intp)
+        regular_count = regular[rows, faces]
+        dealer_count = dealer[rows, faces]
+        if not ((regular_count + dealer_count) > 0).all():
+            raise ValueError("policy chose a face that was not rolled")
+
+        new = (regular_count > 0) & (self.placed[games, players, faces] == 0)
+        self.first_placed[games[new], players[new], faces[new]] = self.turn[games[new]]
+        self.placed[games, players, faces] += regular_count
+        self.dealer_placed[games, faces] += dealer_count
+        self.dice[games, players] -= regular_count
+        self.dealer_dice[games, players] -= dealer_count
+        self.turn[games] += 1
+
+        self._next_player(games, players)
+
+    def _next_player(self, games, players):
+        p = self.num_players
+        order = (players[:, None] + np.arange(1, p + 1)) % p
+        remaining = self.dice[games] + self.dealer_dice[games]
+        has_dice = np.take_along_axis(remaining, order, 1) > 0
+        self.current_player[games] = order[np.arange(games.size), has_dice.argmax(1)]
+        # 모든 플레이어의 주사위가 떨어지면 라운드 종료
+        ended = games[~has_dice.any(1)]
+        if ended.size:
+            self._end_round(ended)
+
+    def round_payouts(self, games):
+        counts = self.placed[games]
+        first = self.first_placed[games]
+        # 딜러 주사위보다 많이 놓은 플레이어만 돈을 받는다
+        eligible = counts > self.dealer_placed[games][:, None, :]
+        winner = eligible.copy()
+        for q in range(self.num_players):
+            same = eligible[:, q:q+1] & (counts[:, q:q+1] == counts) & (first[:, q:q+1] < first)
+            winner &= ~same
+        rank = np.zeros(counts.shape, dtype=np.intp)
+        for q in range(self.num_players):
+            rank += winner[:, q:q+1] & (counts[:, q:q+1] > counts)
+        rank = np.minimum(rank, self.max_casino_cards)
+        payout = np.take_along_axis(self.casino_money[games].transpose(0, 2, 1), rank, 1)
+        return payout * winner
+
+    def _end_round(self, games):
+        payout = self.round_payouts(games)
+        if self.log is not None:
+            self.log.round_end(self, games, payout)
+        self.money[games] += payout.sum(2)
+        self.card_count[games] += (payout > 0).sum(2, dtype=np.int16)
+
+        self.dice[games] = self.num_dice
+        self.dealer_dice[games] = self.num_dealer_dice
+        self.placed[games] = 0
+        self.first_placed[games] = NOT_PLACED
+        self.dealer_placed[games] = 0
+        self.turn[games] = 0
+        self.current_round[games] += 1
+        self.start_player[games] = (self.start_player[games] + 1) % self.num_players
+        self.current_player[games] = self.start_player[games]
+        self.done[games] = self.current_round[games] > self.rounds
+        self._deal(games[~self.done[games]])
+        if self.log is not None and self.done[games].any():
+            self.log.game_end(self, games[self.done[games]])
+
+    def run(self, policy=random_policy):
+        while self.step(policy):
+            pass
+        return self.winners()
+
+    def winners(self):
+        # VegasGame.get_winner 와 같이 (돈, 카드 수) 순으로, 동점이면 앞 번호 플레이어
+        key = self.money * 64 + self.card_count
+        return key.argmax(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="라스베가스 배치 시뮬레이터")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--no-dealer", action="store_true")
+    parser.add_argument("--policy", choices=["random", "greedy"], default="random")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    policy = greedy_policy if args.policy == "greedy" else random_policy
+    start = time.perf_counter()
+    sim = BatchVegas(args.games, args.players, CLASSIC if args.no_dealer else DEALER, seed=args.seed)
+    winners = sim.run(policy)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games / elapsed:,.0f} games/s)")
+    wins = np.bincount(winners, minlength=args.players) / args.games
+    for i, rate in enumerate(wins):
+        print(f"Player {i + 1}: win {rate:.3f}, avg ${sim.money[:, i].mean():,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from engine import VegasGame, Player, Casino, MoneyDeck, DEALER
+from rng import GameRng
+from state import GameState
+from endgame import EndgameSolver, dice_left
+
+# 엔진 핫패스와 화면별 렌더 비용을 재는 벤치마크 모음.
+# 결과는 JSON 으로 저장하고 --compare 로 기준 결과와 비교해 느려진 항목을 표시한다.
+# Streamlit 과 pygame 항목은 import 비용과 실패를 분리하려고 하위 프로세스에서 잰다.
+BENCHMARKS = {}
+
+
+def benchmark(name, unit, higher_is_better=False):
+    def register(fn):
+        BENCHMARKS[name] = (fn, unit, higher_is_better)
+        return fn
+    return register
+
+
+def per_op(run, ops, repeat=5):
+    # run() 은 ops 번 실행한 시간을 돌려준다. 반복 중 가장 빠른 값이 잡음이 가장 적다
+    return min(run() for _ in range(repeat)) / ops * 1e6
+
+
+def random_face(player, rng):
+    return rng.choice(player.current_roll + player.current_dealer_roll)
+
+
+def _rolled_games(count, num_players, rng):
+    games = []
+    for _ in range(count):
+        game = VegasGame(num_players, DEALER, rng=rng.spawn(len(games)))
+        game.play_round()
+        games.append(game)
+    return games
+
+
+def _placed_casinos(count, num_players, rng):
+    deck = MoneyDeck()
+    casinos = []
+    for _ in range(count):
+        deck.shuffle(rng)
+        casino = Casino(1)
+        casino.add_money(deck)
+        for player_id in range(num_players):
+            casino.add_dice(player_id, rng.randrange(5))
+        casino.add_dealer_dice(rng.randrange(3))
+        casinos.append(casino)
+    return casinos
+
+
+@benchmark("engine.roll_dice", "us/op")
+def bench_roll_dice(quick):
+    rng = GameRng(1)
+    player = Player(0, DEALER)
+    n = 20000 if quick else 200000
+
+    def run():
+        start = time.perf_counter()
+        for _ in range(n):
+            player.roll_dice(rng)
+        return time.perf_counter() - start
+    return per_op(run, n)
+
+
+@benchmark("engine.place_dice", "us/op")
+def bench_place_dice(quick):
+    rng = GameRng(2)
+    n = 2000 if quick else 10000
+
+    def run():
+        games = _rolled_games(n, 4, rng)
+        faces = [random_face(game.players[0], rng) for game in games]
+        start = time.perf_counter()
+        for game, face in zip(games, faces):
+            game.place_dice(face)
+        return time.perf_counter() - start
+    return per_op(run, n)
+
+
+@benchmark("engine.next_player", "us/op")
+def bench_next_player(quick):
+    game = VegasGame(4, DEALER, rng=GameRng(3))
+    n = 20000 if quick else 200000
+
+    def run():
+        start = time.perf_counter()
+        for _ in range(n):
+            game.next_player()
+        return time.perf_counter() - start
+    return per_op(run, n)
+
+
+@benchmark("engine.end_round", "us/op")
+def bench_end_round(quick):
+    rng = GameRng(4)
+    n = 1000 if quick else 5000
+
+    def run():
+        games = []
+        for i in range(n):
+            game = VegasGame(4, DEALER, rng=rng.spawn(i))
+            for casino in game.casinos:
+                for player_id in range(4):
+                    casino.add_dice(player_id, rng.randrange(5))
+                casino.add_dealer_dice(rng.randrange(3))
+            games.append(game)
+        start = time.perf_counter()
+        for game in games:
+            game.end_round()
+        return time.perf_counter() - start
+    return per_op(run, n)
+
+
+@benchmark("engine.distribute_money", "us/op")
+def bench_distribute_money(quick):
+    rng = GameRng(5)
+    players = [Player(i, DEALER) for i in range(4)]
+    n = 5000 if quick else 50000
+
+    def run():
+        casinos = _placed_casinos(n, 4, rng)
+        start = time.perf_counter()
+        for casino in casinos:
+            casino.distribute_money(players)
+        return time.perf_counter() - start
+    return per_op(run, n)
+
+
+@benchmark("endgame.solve", "nodes/s", higher_is_better=True)
+def bench_endgame(quick):
+    # 마지막 라운드에 주사위가 남은 상태를 같은 seed 로 만들어 빈 전치표에서 푼다
+    rng = GameRng(6)
+    states = []
+    while len(states) < (3 if quick else 10):
+        state = GameState(3, DEALER, rng.spawn(len(states)))
+        while state.current_round < state.rounds or dice_left(state) > 5:
+            if not state.has_rolled():
+                state.roll_dice(rng)
+            state.place_dice(rng.choice(state.legal_faces()), rng)
+        state.roll_dice(rng)
+        states.append(state)
+    nodes = 0
+    start = time.perf_counter()
+    for state in states:
+        solver = EndgameSolver(max_nodes=10 ** 6)
+        solver.choose(state)
+        nodes += solver.last_stats["nodes"]
+    return nodes / (time.perf_counter() - start)
+
+
+@benchmark("vec_env.step", "steps/s", higher_is_better=True)
+def bench_vec_env(quick):
+    from vec_env import VegasVecEnv, random_actions
+    env = VegasVecEnv(1024, 4, DEALER, seed=7)
+    env.reset()
+    n = 20 if quick else 200
+    start = time.perf_counter()
+    for _ in range(n):
+        env.step(random_actions(env))
+    return env.num_envs * n / (time.perf_counter() - start)
+
+
+def _full_games(num_players, quick):
+    rng = GameRng(10 + num_players)
+    duration = 0.3 if quick else 2.0
+    games = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        game = VegasGame(num_players, DEALER, rng=rng.spawn(games))
+        while not game.is_over():
+            game.play_round()
+            game.place_dice(random_face(game.players[game.current_player], rng))
+        games += 1
+    return games / (time.perf_counter() - start)
+
+
+for _n in range(2, 6):
+    benchmark(f"game.{_n}p", "games/s", higher_is_better=True)(lambda quick, n=_n: _full_games(n, quick))
+
+
+def child_app(quick):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"), default_timeout=60)
+    at.run()
+    at.button[0].click()  # 2인, AI 없이 게임 시작
+    at.run()
+    n = 5 if quick else 30
+    start = time.perf_counter()
+    for _ in range(n):
+        at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return (time.perf_counter() - start) / n * 1e3
+
+
+def child_vegas3d(quick):
+    if not os.environ.get("DISPLAY"):
+        os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+    from vegas3d import Vegas3D
+    view = Vegas3D()
+    view.game.play_round()
+    view.dice_results = view.game.players[0].current_roll
+    view.draw_scene()
+    n = 20 if quick else 200
+    start = time.perf_counter()
+    for _ in range(n):
+        view.draw_scene()
+    return (time.perf_counter() - start) / n * 1e3
+
+
+# 헤드리스 워커가 불러오는 모듈. 여기에 화면 쪽 패키지가 끌려오면 벤치마크가 실패한다
+HEADLESS_MODULES = ("engine", "rng", "state", "odds", "mcts", "endgame", "eventlog", "metrics")
+GUI_PACKAGES = ("tkinter", "streamlit", "PIL", "OpenGL", "pygame")
+
+
+# bench.py 자신이 불러온 모듈이 섞이지 않도록 아무것도 불러오지 않은 인터프리터에서 잰다
+IMPORT_SCRIPT = f"""
+import sys, time
+start = time.perf_counter()
+import {", ".join(HEADLESS_MODULES)}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {GUI_PACKAGES!r} if name in sys.modules]
+if loaded:
+    sys.exit("headless import loaded " + ", ".join(loaded))
+print(elapsed * 1e3)
+"""
+
+
+def fresh_import():
+    proc = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], capture_output=True, text=True, timeout=60,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode == 0:
+        return float(proc.stdout)
+    raise RuntimeError((proc.stderr.strip().splitlines() or [f"exit code {proc.returncode}"])[-1])
+
+
+CHILDREN = {"app.rerun": child_app, "vegas3d.draw_scene": child_vegas3d}
+
+
+def import_time(quick):
+    # 프로세스마다 한 번뿐인 비용이라 새 인터프리터를 여러 번 띄워 가장 빠른 값을 쓴다
+    return min(fresh_import() for _ in range(3 if quick else 10))
+
+
+def run_child(name, quick):
+    command = [sys.executable, os.path.abspath(__file__), "--child", name] + (["--quick"] if quick else [])
+    proc = subprocess.run(command, capture_output=True, text=True, timeout=600)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode == 0 and lines:
+        return json.loads(lines[-1])
+    reason = (proc.stderr.strip().splitlines() or [f"exit code {proc.returncode}"])[-1]
+    raise RuntimeError(reason)
+
+
+benchmark("app.rerun", "ms/rerun")(lambda quick: run_child("app.rerun", quick))
+benchmark("vegas3d.draw_scene", "ms/frame")(lambda quick: run_child("vegas3d.draw_scene", quick))
+benchmark("import.headless", "ms")(import_time)
+
+
+def run_all(names, quick):
+    results = {}
+    for name in names:
+        fn, unit, higher_is_better = BENCHMARKS[name]
+        try:
+            results[name] = {"value": fn(quick), "unit": unit, "higher_is_better": higher_is_better}
+            print(f"{name:>24}  {results[name]['value']:12.3f} {unit}", flush=True)
+        except Exception as e:
+            results[name] = {"skipped": str(e), "unit": unit, "higher_is_better": higher_is_better}
+            print(f"{name:>24}  skipped: {e}", flush=True)
+    return {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                     "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "quick": quick},
+            "results": results}
+
+
+def compare(current, baseline, threshold):
+    # 기준보다 threshold 비율 넘게 나빠진 항목 이름을 돌려준다
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base or "value" not in base:
+            continue
+        if "value" not in result:
+            # 기준에서는 돌았는데 지금 실패하면 (예: 헤드리스 import 에 GUI 패키지가 섞이면) 회귀다
+            regressions.append(name)
+            print(f"{name:>24}  {base['value']:12.3f} -> failed: {result['skipped']}  REGRESSION")
+            continue
+        ratio = result["value"] / base["value"]
+        worse = ratio < 1 - threshold if result["higher_is_better"] else ratio > 1 + threshold
+        if worse:
+            regressions.append(name)
+        print(f"{name:>24}  {base['value']:12.3f} -> {result['value']:12.3f} {result['unit']}  "
+              f"({(ratio - 1) * 100:+.1f}%){'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="라스베가스 벤치마크")
+    parser.add_argument("names", nargs="*", help="돌릴 벤치마크 (이름의 앞부분, 기본값은 전부)")
+    parser.add_argument("--quick", action="store_true", help="반복 수를 줄여 빠르게 확인")
+    parser.add_argument("--out", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--compare", metavar="BASELINE", help="기준 결과 JSON 과 비교")
+    parser.add_argument("--threshold", type=float, default=0.10, help="느려졌다고 볼 비율 (기본 10%%)")
+    parser.add_argument("--list", action="store_true")
+    parser.add_argument("--child", choices=list(CHILDREN), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(CHILDREN[args.child](args.quick)))
+        return
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return
+    names = [name for name in BENCHMARKS if not args.names or any(name.startswith(p) for p in args.names)]
+    results = run_all(names, args.quick)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
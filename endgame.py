@@ -0,0 +1,113 @@
+import time
+from odds import roll_outcomes
+
+# 마지막 라운드에 주사위가 조금 남으면 남은 게임 전체를 정확히 풀 수 있다.
+# 굴림은 확률 가중 평균(기대값), 배치는 현재 플레이어가 자기 승률을 최대로 하는 면을 고르는
+# 다인 expectimax 이고, 같은 상태는 state_hash() 로 전치표에 한 번만 저장한다.
+# 마지막 라운드가 끝나면 새 돈 카드를 나누지 않으므로 탐색 안에 다른 우연 요소가 없다.
+MAX_DICE_LEFT = 6  # 이보다 많이 남았으면 탐색을 시작하지 않는다 (일반 + 딜러, 전체 플레이어 합)
+
+
+class SearchLimit(Exception):
+    pass
+
+
+def dice_left(state):
+    return sum(state.dice) + sum(state.dealer_dice)
+
+
+def terminal_value(state):
+    # 승자 1, 나머지 0 (VegasGame.get_winner 와 같은 동점 처리)
+    value = [0.0] * state.num_players
+    value[state.get_winner()] = 1.0
+    return tuple(value)
+
+
+class EndgameSolver:
+    # max_nodes 는 한 번의 choose() 에서 새로 펼칠 굴림 노드 수의 상한이다.
+    # 넘거나 choose() 에 준 deadline 이 지나면 탐색을 멈추고 None 을 돌려줘 호출한 쪽이 MCTS 로 두게 하고,
+    # 끝까지 푼 부분 트리는 표에 남아 다음 턴에 다시 쓴다.
+    def __init__(self, max_nodes=3000, max_dice_left=MAX_DICE_LEFT, max_table=1 << 20):
+        self.max_nodes = max_nodes
+        self.max_dice_left = max_dice_left
+        self.max_table = max_table
+        self.table = {}
+        self.nodes = 0
+        self.lookups = 0
+        self.hits = 0
+        self.deadline = None
+        self.last_stats = {}
+
+    def solvable(self, state):
+        # 라운드가 끝나면 돈 카드를 새로 뽑으므로 마지막 라운드만 푼다
+        return (state.current_round == state.rounds and not state.is_over()
+                and dice_left(state) <= self.max_dice_left)
+
+    def choose(self, state, deadline=None):
+        # 굴린 뒤의 상태에서 가장 좋은 면. 풀 수 없거나 deadline (perf_counter 기준) 안에 못 풀면 None
+        if not self.solvable(state):
+            return None
+        if len(self.table) > self.max_table:
+            self.table.clear()
+        self.nodes = self.lookups = self.hits = 0
+        self.deadline = deadline
+        start = time.perf_counter()
+        try:
+            face, value = self.best_face(state, state.roll, state.dealer_roll, {})
+        except SearchLimit:
+            face = value = None
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            "nodes": self.nodes, "elapsed": elapsed,
+            "nodes_per_sec": self.nodes / elapsed if elapsed > 0 else 0.0,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "table_size": len(self.table), "solved": face is not None,
+        }
+        if value is not None:
+            self.last_stats["win_probability"] = value[state.current_player]
+        return face
+
+    def best_face(self, state, roll, dealer_roll, moves):
+        # 배치 결과는 (면, 일반 개수, 딜러 개수) 로만 정해지므로 같은 노드의 굴림들이 moves 를 나눠 쓴다
+        player = state.current_player
+        best_face = best = None
+        for face in range(6):
+            regular, dealer = roll[face], dealer_roll[face]
+            if not (regular or dealer):
+                continue
+            move = (face, regular, dealer)
+            value = moves.get(move)
+            if value is None:
+                child = state.clone()
+                child.roll = bytearray(6)
+                child.dealer_roll = bytearray(6)
+                child.roll[face] = regular
+                child.dealer_roll[face] = dealer
+                child.place_dice(face + 1)
+                value = moves[move] = self.value(child)
+            if best is None or value[player] > best[player]:
+                best_face, best = face + 1, value
+        return best_face, best
+
+    def value(self, state):
+        # 아직 굴리지 않은 상태에서 각 플레이어의 승률
+        if state.is_over():
+            return terminal_value(state)
+        key = state.state_hash()
+        self.lookups += 1
+        cached = self.table.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.nodes += 1
+        if self.nodes > self.max_nodes or (self.deadline is not None and time.perf_counter() >= self.deadline):
+            raise SearchLimit
+        total = [0.0] * state.num_players
+        player = state.current_player
+        moves = {}
+        for roll, dealer_roll, p in roll_outcomes(state.dice[player], state.dealer_dice[player]):
+            for i, v in enumerate(self.best_face(state, roll, dealer_roll, moves)[1]):
+                total[i] += p * v
+        total = tuple(total)
+        self.table[key] = total
+        return total
@@ -0,0 +1,223 @@
+from collections import Counter, namedtuple
+from rng import GameRng
+
+# tkinter(main.py), Streamlit(app.py), pygame(vegas3d.py) 화면이 함께 쓰는 규칙 엔진.
+# 화면마다 달랐던 규칙은 Variant 설정으로 표현한다.
+Variant = namedtuple("Variant", ["dice_per_player", "dealer_dice", "casino_funding", "rounds"],
+                     defaults=(8, 0, 50000, 4))
+
+CLASSIC = Variant()                # main.py, vegas3d.py
+DEALER = Variant(dealer_dice=4)    # app.py: 플레이어마다 딜러 주사위 4개
+
+MONEY_CARDS = (10000,) * 6 + (20000,) * 8 + (30000,) * 8 + (40000,) * 6 + \
+              (50000,) * 6 + (60000,) * 5 + (70000,) * 5 + (80000,) * 5 + (90000,) * 5
+
+
+class VegasGame:
+    def __init__(self, num_players, variant=CLASSIC, log=None, rng=None):
+        self.num_players = num_players
+        self.variant = variant
+        # 게임마다 따로 쓰는 난수. seed 를 주면 같은 게임이 다시 나온다
+        self.rng = rng if rng is not None else GameRng()
+        self.players = [Player(i, variant) for i in range(num_players)]
+        self.casinos = [Casino(i, variant.casino_funding) for i in range(1, 7)]
+        self.deck = MoneyDeck()
+        self.current_round = 1
+        self.start_player = 0
+        self.current_player = 0
+        self.dice_rolled = False
+        self.last_winnings = None
+        self.log = log  # eventlog.GameRecorder 처럼 상태 변화를 받아 적는 객체
+        self.setup_game()
+        if log is not None:
+            log.game_start(self)
+
+    def setup_game(self):
+        self.deck.shuffle(self.rng)
+        for casino in self.casinos:
+            casino.add_money(self.deck)
+
+    def is_over(self):
+        return self.current_round > self.variant.rounds
+
+    def play_round(self):
+        player = self.players[self.current_player]
+        if (player.dice or player.dealer_dice) and not self.dice_rolled:
+            player.roll_dice(self.rng)
+            self.dice_rolled = True
+            if self.log is not None:
+                self.log.roll(player)
+            return True
+        return False
+
+    def place_dice(self, casino_index):
+        if not self.dice_rolled:
+            return False
+        player = self.players[self.current_player]
+        regular_count = player.current_roll.count(casino_index)
+        dealer_count = player.current_dealer_roll.count(casino_index) if player.current_dealer_roll else 0
+        if not (regular_count or dealer_count):
+            return False
+
+        if self.log is not None:
+            self.log.place(casino_index)
+        casino = self.casinos[casino_index - 1]
+        if regular_count:
+            player.dice -= regular_count
+            casino.add_dice(player.id, regular_count)
+        if dealer_count:
+            player.dealer_dice -= dealer_count
+            casino.add_dealer_dice(dealer_count)
+        # 남은 주사위는 다음 차례에 다시 굴린다
+        player.current_roll = []
+        player.current_dealer_roll = []
+        self.next_player()  # 배팅 후 바로 다음 플레이어로 넘어감
+        return True
+
+    def next_player(self):
+        self.dice_rolled = False
+        players = self.players
+        for step in range(1, self.num_players + 1):
+            index = (self.current_player + step) % self.num_players
+            if players[index].dice or players[index].dealer_dice:
+                self.current_player = index
+                return
+        # 모든 플레이어의 주사위가 떨어지면 라운드 종료
+        self.last_winnings = self.end_round()
+
+    def end_round(self):
+        winnings = {player.id: [] for player in self.players}
+        for casino in self.casinos:
+            casino_winnings = casino.distribute_money(self.players)
+            for player_id, amount in casino_winnings.items():
+                winnings[player_id].append((casino.number, amount))
+                if self.log is not None:
+                    self.log.payout(casino.number, player_id, amount)
+
+        for player in self.players:
+            player.reset_dice()
+
+        # 새로운 돈 카드 준비
+        self.deck.shuffle(self.rng)
+        for casino in self.casinos:
+            casino.reset(self.deck)
+
+        self.current_round += 1
+        self.start_player = (self.start_player + 1) % self.num_players
+        self.current_player = self.start_player
+        self.dice_rolled = False
+        if self.log is not None:
+            if self.is_over():
+                self.log.game_end(self)
+            else:
+                self.log.deal(self)
+
+        return winnings
+
+    def get_winner(self):
+        return max(self.players, key=lambda p: (p.money, p.card_count))
+
+
+class Player:
+    def __init__(self, id, variant=CLASSIC):
+        self.id = id
+        self.variant = variant
+        self.dice = variant.dice_per_player
+        self.dealer_dice = variant.dealer_dice
+        self.money = 0
+        self.card_count = 0
+        self.current_roll = []
+        self.current_dealer_roll = []
+
+    def roll_dice(self, rng):
+        self.current_roll = sorted(rng.roll(self.dice))  # 주사위 결과를 정렬
+        self.current_dealer_roll = sorted(rng.roll(self.dealer_dice))
+
+    def get_dice_count(self):
+        return Counter(self.current_roll)  # 각 숫자별 주사위 개수를 반환
+
+    def get_dealer_dice_count(self):
+        return Counter(self.current_dealer_roll)
+
+    def reset_dice(self):
+        self.dice = self.variant.dice_per_player
+        self.dealer_dice = self.variant.dealer_dice
+        self.current_roll = []
+        self.current_dealer_roll = []
+
+    def add_money(self, amount):
+        self.money += amount
+        self.card_count += 1
+
+
+class MoneyDeck:
+    # 고정된 카드 표(MONEY_CARDS)는 그대로 두고 카드 번호 순열만 섞는다.
+    # 라운드마다 54장 리스트를 새로 만들지 않고, 맨 위(top)에서부터 뽑는다.
+    def __init__(self, cards=MONEY_CARDS):
+        self.cards = cards
+        self.order = list(range(len(cards)))
+        self.top = 0
+
+    def shuffle(self, rng):
+        rng.shuffle(self.order)
+        self.top = len(self.order)
+
+    def deal(self, funding):
+        # 자금을 채울 때까지 뽑아서 큰 지폐부터 정렬해 돌려준다
+        cards = self.cards
+        stack = []
+        total = 0
+        while total < funding and self.top:
+            self.top -= 1
+            card = cards[self.order[self.top]]
+            stack.append(card)
+            total += card
+        stack.sort(reverse=True)
+        return stack
+
+
+class Casino:
+    def __init__(self, number, funding=50000):
+        self.number = number
+        self.funding = funding
+        self.dice = {}
+        self.dealer_dice = 0  # 딜러 주사위 개수 초기화
+        self.money = []
+
+    def add_dice(self, player_id, count):
+        self.dice[player_id] = self.dice.get(player_id, 0) + count
+
+    def add_dealer_dice(self, count):
+        self.dealer_dice += count  # 딜러 주사위 개수 증가
+
+    def add_money(self, deck):
+        self.money.extend(deck.deal(self.funding))
+        self.money.sort(reverse=True)  # 항상 큰 지폐가 앞에 온다
+
+    def distribute_money(self, players):
+        if self.dealer_dice >= max(self.dice.values(), default=0):
+            return {}
+
+        # 같은 개수면 먼저 놓은 플레이어가 이긴다 (dict 삽입 순서 + 안정 정렬)
+        unique_counts = {}
+        for player_id, count in sorted(self.dice.items(), key=lambda x: x[1], reverse=True):
+            if count > self.dealer_dice and count not in unique_counts:
+                unique_counts[count] = player_id
+
+        # 돈은 큰 지폐부터 정렬돼 있어 순위가 곧 카드 위치다
+        winnings = {}
+        for rank, (count, player_id) in enumerate(sorted(unique_counts.items(), reverse=True)):
+            amount = self.money[rank] if rank < len(self.money) else 0
+            if amount:
+                players[player_id].add_money(amount)
+            winnings[player_id] = amount
+        del self.money[:len(winnings)]
+
+        return winnings
+
+    def reset(self, deck=None):
+        self.dice.clear()
+        self.dealer_dice = 0  # 딜러 주사위 개수 초기화
+        self.money.clear()  # 기존 돈을 모두 제거
+        if deck is not None:
+            self.add_money(deck)  # 새로운 돈 추가
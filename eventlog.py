@@ -0,0 +1,239 @@
+import functools
+import struct
+from engine import VegasGame, Variant
+from odds import roll_table
+
+# 게임마다 상태 변화를 작은 바이너리 이벤트로 기록한다.
+# 한 게임은 (길이 varint + 이벤트들) 한 덩어리로 로그 파일 끝에 덧붙인다.
+# 이벤트의 첫 바이트 상위 4비트가 종류, 하위 4비트는 종류별 작은 값이다.
+GAME_START = 0x10   # + 플레이어 수, 주사위 수, 딜러 주사위 수, 라운드 수, 자금/10000, game.rng 의 seed(8) + 카지노 돈
+DEAL = 0x20         # + 카지노 돈 (카지노마다 장수 + 장마다 금액/10000)
+ROLL = 0x30         # + roll_table 안의 일반 주사위 결과 번호(2) [+ 딜러 주사위 결과 번호(1)]
+PLACE = 0x40        # 하위 4비트 = 카지노 번호
+PAYOUT = 0x50       # 하위 4비트 = 카지노 번호, + 플레이어, 금액/10000
+GAME_END = 0x60
+ABORT = 0x70        # 하위 4비트 = ABORT_REASONS 번호. 끝나기 전에 닫힌 게임의 마지막 이벤트
+ABORT_REASONS = ("unknown", "player left", "idle timeout", "server shutdown")
+
+MONEY_UNIT = 10000
+
+
+@functools.lru_cache(maxsize=None)
+def _roll_index(count):
+    return {hist: i for i, (hist, _) in enumerate(roll_table(count))}
+
+
+def _histogram(roll):
+    hist = bytearray(6)
+    for face in roll:
+        hist[face - 1] += 1
+    return bytes(hist)
+
+
+def _stacks(game):
+    data = bytearray()
+    for casino in game.casinos:
+        data.append(len(casino.money))
+        data.extend(card // MONEY_UNIT for card in casino.money)
+    return data
+
+
+def _write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+class GameRecorder:
+    # VegasGame(..., log=GameRecorder(sink)) 로 붙이면 엔진이 이벤트마다 호출한다
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.data = bytearray()
+
+    def game_start(self, game):
+        v = game.variant
+        self.data.append(GAME_START)
+        self.data.extend((game.num_players, v.dice_per_player, v.dealer_dice, v.rounds,
+                          v.casino_funding // MONEY_UNIT))
+        self.data.extend(struct.pack("<Q", game.rng.root_seed & 0xffffffffffffffff))
+        self.data.extend(_stacks(game))
+
+    def deal(self, game):
+        self.data.append(DEAL)
+        self.data.extend(_stacks(game))
+
+    def roll(self, player):
+        self.data.append(ROLL)
+        self.data.extend(struct.pack("<H", _roll_index(player.dice)[_histogram(player.current_roll)]))
+        if player.variant.dealer_dice:
+            self.data.append(_roll_index(player.dealer_dice)[_histogram(player.current_dealer_roll)])
+
+    def place(self, casino_index):
+        self.data.append(PLACE | casino_index)
+
+    def payout(self, casino_number, player_id, amount):
+        self.data.extend((PAYOUT | casino_number, player_id, amount // MONEY_UNIT))
+
+    def game_end(self, game):
+        self.data.append(GAME_END)
+        if self.sink is not None:
+            self.sink.append(self.data)
+
+    def abort(self, reason=None):
+        # 게임이 끝나기 전에 닫혀도 그때까지의 기록을 남긴다
+        self.data.append(ABORT | (ABORT_REASONS.index(reason) if reason in ABORT_REASONS else 0))
+        if self.sink is not None:
+            self.sink.append(self.data)
+
+
+class EventLog:
+    # 덧붙이기 전용 로그. 게임 기록을 버퍼에 모았다가 flush_bytes 를 넘으면 한 번에 쓴다.
+    def __init__(self, path, flush_bytes=1 << 16):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.buffer = bytearray()
+        self.file = open(path, "ab")
+        self.games = 0
+
+    def append(self, record):
+        _write_varint(self.buffer, len(record))
+        self.buffer.extend(record)
+        self.games += 1
+        if len(self.buffer) >= self.flush_bytes:
+            self.flush()
+
+    def recorder(self):
+        return GameRecorder(self)
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_records(path, chunk_size=1 << 16):
+    # 파일을 조각 단위로 읽으며 게임 기록을 하나씩 돌려준다
+    with open(path, "rb") as f:
+        buf = b""
+        pos = 0
+        while True:
+            chunk = f.read(chunk_size)
+            buf = buf[pos:] + chunk
+            pos = 0
+            while True:
+                length = shift = 0
+                i = pos
+                while i < len(buf):
+                    byte = buf[i]
+                    i += 1
+                    length |= (byte & 0x7f) << shift
+                    shift += 7
+                    if not byte & 0x80:
+                        break
+                else:
+                    break
+                if i + length > len(buf):
+                    break
+                yield buf[i:i + length]
+                pos = i + length
+            if not chunk:
+                if pos < len(buf):
+                    raise ValueError("truncated event log")
+                return
+
+
+def _read_stacks(game, data, pos):
+    for casino in game.casinos:
+        count = data[pos]
+        casino.money = [card * MONEY_UNIT for card in data[pos + 1:pos + 1 + count]]
+        pos += 1 + count
+    return pos
+
+
+def iter_events(record):
+    roll_size = 3 if record[3] else 2  # 딜러 주사위가 있으면 결과 번호가 한 바이트 더 붙는다
+    pos = 0
+    while pos < len(record):
+        tag = record[pos]
+        kind = tag & 0xf0
+        if kind == GAME_START:
+            yield kind, record[pos + 1:pos + 14]
+            pos += 14
+            for _ in range(6):
+                pos += 1 + record[pos]
+        elif kind == DEAL:
+            start = pos + 1
+            pos = start
+            for _ in range(6):
+                pos += 1 + record[pos]
+            yield kind, record[start:pos]
+        elif kind == ROLL:
+            yield kind, record[pos + 1:pos + 1 + roll_size]
+            pos += 1 + roll_size
+        elif kind == PLACE:
+            yield kind, tag & 0x0f
+            pos += 1
+        elif kind == PAYOUT:
+            yield kind, (tag & 0x0f, record[pos + 1], record[pos + 2] * MONEY_UNIT)
+            pos += 3
+        elif kind == GAME_END:
+            yield kind, None
+            pos += 1
+        elif kind == ABORT:
+            yield kind, ABORT_REASONS[tag & 0x0f] if tag & 0x0f < len(ABORT_REASONS) else ABORT_REASONS[0]
+            pos += 1
+        else:
+            raise ValueError(f"unknown event 0x{tag:02x} at {pos}")
+
+
+def replay(record, upto=None):
+    # 기록을 처음부터 엔진에 다시 적용해 VegasGame 을 만든다. upto 를 주면 그 수의 이벤트까지만 적용한다.
+    header = record[1:14]
+    num_players, dice, dealer_dice, rounds, funding = header[:5]
+    game = VegasGame(num_players, Variant(dice, dealer_dice, funding * MONEY_UNIT, rounds))
+    pos = _read_stacks(game, record, 14)
+    applied = 1
+    while pos < len(record) and (upto is None or applied < upto):
+        tag = record[pos]
+        kind = tag & 0xf0
+        if kind == DEAL:
+            pos = _read_stacks(game, record, pos + 1)
+        elif kind == ROLL:
+            player = game.players[game.current_player]
+            hist = roll_table(player.dice)[record[pos + 1] | record[pos + 2] << 8][0]
+            player.current_roll = [face for face in range(1, 7) for _ in range(hist[face - 1])]
+            pos += 3
+            if dealer_dice:
+                hist = roll_table(player.dealer_dice)[record[pos]][0]
+                player.current_dealer_roll = [face for face in range(1, 7) for _ in range(hist[face - 1])]
+                pos += 1
+            game.dice_rolled = True
+        elif kind == PLACE:
+            if not game.place_dice(tag & 0x0f):
+                raise ValueError(f"illegal placement in event log at {pos}")
+            pos += 1
+        elif kind == PAYOUT:
+            pos += 3  # 배당은 엔진이 같은 돈 카드로 다시 계산한다
+        elif kind in (GAME_END, ABORT):
+            pos += 1
+        else:
+            raise ValueError(f"unknown event 0x{tag:02x} at {pos}")
+        applied += 1
+    return game
+
+
+def load_games(path):
+    for record in iter_records(path):
+        yield replay(record)
@@ -0,0 +1,133 @@
+from collections import namedtuple
+
+# 게임 진행을 되돌리고 다시 하기 위한 수 기록.
+# 각 노드는 그 시점의 게임 전체를 불변 튜플로 들고 있지만, 배치 한 번은 카지노 하나와 플레이어 하나만 바꾸므로
+# 나머지 카지노와 플레이어 튜플은 부모 노드와 같은 객체를 그대로 나눠 쓴다 (구조적 공유).
+# 되돌릴 때도 두 노드에서 객체가 다른 카지노와 플레이어만 VegasGame 에 다시 써 넣는다.
+# 되돌린 뒤 다른 수를 두면 새 가지가 생기고, 예전 가지는 branches() 로 다시 갈 수 있다.
+CasinoState = namedtuple("CasinoState", ["dice", "dealer_dice", "money"])  # dice 는 (플레이어, 개수) 를 첫 배치 순서대로
+PlayerState = namedtuple("PlayerState", ["dice", "dealer_dice", "money", "card_count",
+                                         "current_roll", "current_dealer_roll"])
+Snapshot = namedtuple("Snapshot", ["casinos", "players", "current_round", "start_player", "current_player",
+                                   "dice_rolled", "last_winnings"])
+
+
+def freeze_casino(casino):
+    return CasinoState(tuple(casino.dice.items()), casino.dealer_dice, tuple(casino.money))
+
+
+def freeze_player(player):
+    return PlayerState(player.dice, player.dealer_dice, player.money, player.card_count,
+                       tuple(player.current_roll), tuple(player.current_dealer_roll))
+
+
+def snapshot(game):
+    return Snapshot(tuple(freeze_casino(c) for c in game.casinos), tuple(freeze_player(p) for p in game.players),
+                    game.current_round, game.start_player, game.current_player, game.dice_rolled,
+                    game.last_winnings)
+
+
+def replace_at(items, index, item):
+    return items[:index] + (item,) + items[index + 1:]
+
+
+def thaw_casino(casino, state):
+    casino.dice = dict(state.dice)
+    casino.dealer_dice = state.dealer_dice
+    casino.money = list(state.money)
+
+
+def thaw_player(player, state):
+    player.dice = state.dice
+    player.dealer_dice = state.dealer_dice
+    player.money = state.money
+    player.card_count = state.card_count
+    player.current_roll = list(state.current_roll)
+    player.current_dealer_roll = list(state.current_dealer_roll)
+
+
+class Node:
+    __slots__ = ("state", "parent", "move", "children")
+
+    def __init__(self, state, parent=None, move=None):
+        self.state = state
+        self.parent = parent
+        self.move = move  # 이 노드로 오게 한 (플레이어, 카지노 번호)
+        self.children = []
+
+
+class History:
+    # 주사위 굴리기와 배치를 VegasGame 과 같은 이름의 이 객체 메서드로 해야 기록이 게임과 맞는다.
+    # 되돌리기는 배치만 되돌린다: 굴린 결과는 그대로 남아 같은 주사위로 다시 고르게 된다.
+    def __init__(self, game):
+        self.game = game
+        self.root = self.node = Node(snapshot(game))
+
+    def play_round(self):
+        game = self.game
+        if not game.play_round():
+            return False
+        p = game.current_player
+        state = self.node.state
+        self.node.state = state._replace(players=replace_at(state.players, p, freeze_player(game.players[p])),
+                                         dice_rolled=True)
+        return True
+
+    def place_dice(self, casino_index):
+        game = self.game
+        player_id = game.current_player
+        round_before = game.current_round
+        if not game.place_dice(casino_index):
+            return False
+        state = self.node.state
+        if game.current_round == round_before:
+            state = state._replace(
+                casinos=replace_at(state.casinos, casino_index - 1, freeze_casino(game.casinos[casino_index - 1])),
+                players=replace_at(state.players, player_id, freeze_player(game.players[player_id])),
+                current_player=game.current_player, dice_rolled=game.dice_rolled)
+        else:
+            state = snapshot(game)  # 라운드 정산은 모든 카지노와 플레이어를 바꾼다
+        node = Node(state, self.node, (player_id, casino_index))
+        self.node.children.append(node)
+        self.node = node
+        return True
+
+    def can_undo(self):
+        return self.node.parent is not None
+
+    def can_redo(self):
+        return bool(self.node.children)
+
+    def undo(self):
+        if self.node.parent is None:
+            return None
+        move = self.node.move
+        self.goto(self.node.parent)
+        return move
+
+    def redo(self, branch=-1):
+        # 기본은 가장 최근에 둔 가지
+        if not self.node.children:
+            return None
+        node = self.node.children[branch]
+        self.goto(node)
+        return node.move
+
+    def branches(self):
+        return [child.move for child in self.node.children]
+
+    def goto(self, node):
+        game = self.game
+        current, target = self.node.state, node.state
+        for i, (a, b) in enumerate(zip(current.casinos, target.casinos)):
+            if a is not b:
+                thaw_casino(game.casinos[i], b)
+        for i, (a, b) in enumerate(zip(current.players, target.players)):
+            if a is not b:
+                thaw_player(game.players[i], b)
+        game.current_round = target.current_round
+        game.start_player = target.start_player
+        game.current_player = target.current_player
+        game.dice_rolled = target.dice_rolled
+        game.last_winnings = target.last_winnings
+        self.node = node
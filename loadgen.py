@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+# server.py 에 스크립트 클라이언트를 붙여 초당 수 처리량과 수 지연 시간(p50/p99)을 잰다.
+
+
+class Bot:
+    def __init__(self, rng, latencies):
+        self.rng = rng
+        self.latencies = latencies
+        self.reader = None
+        self.writer = None
+        self.seat = None
+        self.state = None
+        self.pending = None
+        self.moves = 0
+
+    async def connect(self, host, port, path):
+        if path:
+            self.reader, self.writer = await asyncio.open_unix_connection(path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    async def request(self, message):
+        self.writer.write((json.dumps(message) + "\n").encode())
+        await self.writer.drain()
+        while True:
+            reply = json.loads(await self.reader.readline())
+            if reply["type"] in ("reply", "error"):
+                return reply
+            if reply["type"] == "state":
+                self.state = reply
+
+    def send_move(self, message):
+        self.pending = time.perf_counter()
+        self.writer.write((json.dumps(message) + "\n").encode())
+
+    def act(self, state):
+        if not state.get("started") or state.get("over") or state["current"] != self.seat:
+            return
+        if not state["rolled"]:
+            self.send_move({"op": "roll"})
+        else:
+            faces = sorted(set(state["roll"] + state["dealer_roll"]))
+            self.send_move({"op": "place", "face": self.rng.choice(faces)})
+
+    async def play(self):
+        state = self.state
+        if state is not None:
+            self.act(state)
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            kind = message["type"]
+            if kind == "state":
+                state = self.state = message
+            elif kind in ("reply", "error"):
+                self.latencies.append(time.perf_counter() - self.pending)
+                self.pending = None
+                self.moves += 1
+            elif kind == "closed":
+                return
+            # 마지막 수의 응답까지 받은 뒤에 끝낸다
+            if state is not None and state.get("over") and self.pending is None:
+                return
+            if self.pending is None and state is not None:
+                self.act(state)
+
+    def close(self):
+        self.writer.close()
+
+
+async def run_table(args, rng, latencies, moves):
+    bots = [Bot(random.Random(rng.random()), latencies) for _ in range(args.players)]
+    for bot in bots:
+        await bot.connect(args.host, args.port, args.unix)
+    for _ in range(args.games):
+        for bot in bots:
+            bot.state = None
+        reply = await bots[0].request({"op": "create", "players": args.players, "variant": args.variant})
+        bots[0].seat = reply["seat"]
+        for bot in bots[1:]:
+            bot.seat = (await bot.request({"op": "join", "table": reply["table"]}))["seat"]
+        await asyncio.gather(*(bot.play() for bot in bots))
+    moves.append(sum(bot.moves for bot in bots))
+    for bot in bots:
+        bot.close()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    latencies = []
+    moves = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_table(args, rng, latencies, moves) for _ in range(args.tables)))
+    elapsed = time.perf_counter() - start
+    total = sum(moves)
+    print(f"{args.tables} tables x {args.games} games, {total} moves in {elapsed:.2f}s "
+          f"({total / elapsed:,.0f} moves/s)")
+    print(f"move latency p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="라스베가스 서버 부하 생성기")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix")
+    parser.add_argument("--tables", type=int, default=100)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--games", type=int, default=1, help="테이블마다 연속으로 할 게임 수")
+    parser.add_argument("--variant", choices=["classic", "dealer"], default="dealer")
+    parser.add_argument("--seed", type=int, default=None)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
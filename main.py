@@ -1,141 +1,42 @@
-import random
 import tkinter as tk
 from tkinter import messagebox
-from collections import Counter
 from PIL import Image, ImageDraw, ImageFont, ImageTk
+from engine import VegasGame, CLASSIC
+from mcts import MCTSPlayer, search_summary
+import metrics
 
-class VegasGame:
-    def __init__(self, num_players):
-        self.num_players = num_players
-        self.players = [Player(i) for i in range(num_players)]
-        self.casinos = [Casino(i) for i in range(1, 7)]
-        self.current_round = 1
-        self.start_player = 0
-        self.current_player = 0
-        self.setup_game()
-
-    def setup_game(self):
-        money_cards = [10000] * 6 + [20000] * 8 + [30000] * 8 + [40000] * 6 + \
-                      [50000] * 6 + [60000] * 5 + [70000] * 5 + [80000] * 5 + [90000] * 5
-        random.shuffle(money_cards)
-        for casino in self.casinos:
-            casino.add_money(money_cards)
-
-    def play_round(self):
-        player = self.players[self.current_player]
-        if player.dice:
-            player.roll_dice()
-            return True
-        return False
-
-    def place_dice(self, casino_index):
-        player = self.players[self.current_player]
-        if casino_index in player.current_roll:
-            count = player.current_roll.count(casino_index)
-            player.dice -= count
-            self.casinos[casino_index - 1].add_dice(player.id, count)
-            player.current_roll = [d for d in player.current_roll if d != casino_index]
-            self.next_player()
-            return True
-        return False
-
-    def next_player(self):
-        self.current_player = (self.current_player + 1) % self.num_players
-        while self.players[self.current_player].dice == 0:
-            self.current_player = (self.current_player + 1) % self.num_players
-            if self.current_player == self.start_player:
-                self.end_round()
-                break
-
-    def end_round(self):
-        winnings = {player.id: [] for player in self.players}
-        for casino in self.casinos:
-            casino_winnings = casino.distribute_money(self.players)
-            for player_id, amount in casino_winnings.items():
-                winnings[player_id].append((casino.number, amount))
-        
-        for player in self.players:
-            player.reset_dice()
-        
-        # 새로운 돈 카드 준비
-        money_cards = [10000] * 6 + [20000] * 8 + [30000] * 8 + [40000] * 6 + \
-                      [50000] * 6 + [60000] * 5 + [70000] * 5 + [80000] * 5 + [90000] * 5
-        random.shuffle(money_cards)
-        
-        for casino in self.casinos:
-            casino.reset(money_cards)
-        
-        self.current_round += 1
-        self.start_player = (self.start_player + 1) % self.num_players
-        self.current_player = self.start_player
-        
-        return winnings
-
-    def get_winner(self):
-        return max(self.players, key=lambda p: (p.money, p.card_count))
+_UNSET = object()
 
-class Player:
-    def __init__(self, id):
-        self.id = id
-        self.dice = 8
-        self.money = 0
-        self.card_count = 0
-        self.current_roll = []
 
-    def roll_dice(self):
-        self.current_roll = [random.randint(1, 6) for _ in range(self.dice)]
-        self.current_roll.sort()  # 주사위 결과를 정렬
-
-    def get_dice_count(self):
-        return Counter(self.current_roll)  # 각 숫자별 주사위 개수를 반환
-
-    def reset_dice(self):
-        self.dice = 8
-        self.current_roll = []
-
-    def add_money(self, amount):
-        self.money += amount
-        self.card_count += 1
-
-class Casino:
-    def __init__(self, number):
-        self.number = number
-        self.dice = {}
-        self.money = []
-
-    def add_dice(self, player_id, count):
-        self.dice[player_id] = self.dice.get(player_id, 0) + count
-
-    def add_money(self, money_cards):
-        total = 0
-        while total < 50000 and money_cards:
-            card = money_cards.pop()
-            self.money.append(card)
-            total += card
-
-    def distribute_money(self, players):
-        dice_counts = sorted(self.dice.items(), key=lambda x: x[1], reverse=True)
-        unique_counts = {}
-        for player_id, count in dice_counts:
-            if count not in unique_counts:
-                unique_counts[count] = player_id
-        
-        winnings = {}
-        for count, player_id in sorted(unique_counts.items(), reverse=True):
-            if self.money:
-                amount = self.money.pop(0)
-                players[player_id].add_money(amount)
-                winnings[player_id] = amount
-            else:
-                winnings[player_id] = 0
-        
-        return winnings
+class WidgetView:
+    # 위젯마다 마지막으로 그린 옵션을 기억해 두고 바뀐 옵션만 config 한다.
+    # set() 은 바로 그리지 않고 모아 두었다가 한 번의 after_idle 콜백에서 적용한다.
+    def __init__(self, master):
+        self.master = master
+        self.rendered = {}
+        self.pending = {}
+        self.scheduled = False
+
+    def set(self, widget, **options):
+        self.pending.setdefault(widget, {}).update(options)
+        if not self.scheduled:
+            self.scheduled = True
+            self.master.after_idle(self.flush)
+
+    def flush(self):
+        pending, self.pending = self.pending, {}
+        self.scheduled = False
+        for widget, options in pending.items():
+            last = self.rendered.setdefault(widget, {})
+            changed = {k: v for k, v in options.items() if last.get(k, _UNSET) != v}
+            if changed:
+                widget.config(**changed)
+                last.update(changed)
+
+    def forget(self, widget):
+        self.rendered.pop(widget, None)
+        self.pending.pop(widget, None)
 
-    def reset(self, money_cards=None):
-        self.dice.clear()
-        self.money.clear()  # 기존 돈을 모두 제거
-        if money_cards:
-            self.add_money(money_cards)  # 새로운 돈 추가
 
 class VegasGameGUI:
     def __init__(self, master):
@@ -143,6 +44,9 @@ class VegasGameGUI:
         self.master.title("라스베가스 게임")
         self.master.geometry("1200x800")
         self.game = None
+        self.ai = MCTSPlayer(time_budget=0.2)
+        self.ai_players = set()
+        self.view = WidgetView(master)
         self.load_images()  # 이미지 로드를 먼저 수행
         self.setup_ui()
 
@@ -153,6 +57,9 @@ class VegasGameGUI:
         tk.Label(self.start_frame, text="플레이어 수:").pack(side=tk.LEFT)
         self.player_count = tk.StringVar(value="2")
         tk.OptionMenu(self.start_frame, self.player_count, "2", "3", "4", "5").pack(side=tk.LEFT)
+        tk.Label(self.start_frame, text="AI 플레이어 수:").pack(side=tk.LEFT)
+        self.ai_count = tk.StringVar(value="0")
+        tk.OptionMenu(self.start_frame, self.ai_count, "0", "1", "2", "3", "4", "5").pack(side=tk.LEFT)
         tk.Button(self.start_frame, text="게임 시작", command=self.start_game).pack(side=tk.LEFT)
 
         self.game_frame = tk.Frame(self.master)
@@ -174,6 +81,8 @@ class VegasGameGUI:
         self.info_frame.pack(pady=10)
         self.info_label = tk.Label(self.info_frame, text="")
         self.info_label.pack()
+        self.ai_label = tk.Label(self.info_frame, text="")
+        self.ai_label.pack()
 
         self.dice_frame = tk.Frame(self.master)
         self.dice_frame.pack(pady=10)
@@ -191,45 +100,79 @@ class VegasGameGUI:
 
     def start_game(self):
         num_players = int(self.player_count.get())
-        self.game = VegasGame(num_players)
+        self.game = VegasGame(num_players, CLASSIC)
+        # 플레이어 돈 라벨은 게임마다 한 번만 만들고 이후에는 글자만 바꾼다
+        for label in self.player_money_labels:
+            self.view.forget(label)
+            label.destroy()
+        self.player_money_labels = []
+        for _ in range(num_players):
+            label = tk.Label(self.player_money_frame, image=self.money_image, compound=tk.LEFT)
+            label.pack(side=tk.LEFT, padx=5)
+            self.player_money_labels.append(label)
+        # 뒤쪽 자리부터 AI 가 맡는다
+        ai_count = min(int(self.ai_count.get()), num_players)
+        self.ai_players = set(range(num_players - ai_count, num_players))
         self.start_frame.pack_forget()
         self.game_frame.pack()
         self.update_info()
         self.update_casino_money()
         self.update_player_money()
-        self.roll_button.config(state=tk.NORMAL)
+        self.view.set(self.roll_button, state=tk.NORMAL)
+        self.schedule_ai_turn()
 
     def roll_dice(self):
         if self.game and self.game.play_round():
             self.update_info()
             self.update_player_money()
-            self.roll_button.config(state=tk.DISABLED)
+            self.view.set(self.roll_button, state=tk.DISABLED)
         else:
             self.end_game()
 
-    def place_dice(self, casino_index):
-        if self.game and self.game.place_dice(casino_index):
+    def place_dice(self, casino_index, by_ai=False):
+        if self.game and self.game.current_player in self.ai_players and not by_ai:
+            return
+        if not self.game:
+            return
+        round_before = self.game.current_round
+        if self.game.place_dice(casino_index):
             self.update_info()
             self.update_casino_money()
             self.update_player_money()
-            if self.game.current_round <= 4:
-                if all(player.dice == 0 for player in self.game.players):
-                    self.end_round()
-                else:
-                    self.roll_button.config(state=tk.NORMAL)
+            # 마지막 주사위가 놓이면 엔진이 라운드를 정산한다
+            if self.game.current_round != round_before:
+                self.end_round()
             else:
-                self.end_game()
+                self.view.set(self.roll_button, state=tk.NORMAL)
+                self.schedule_ai_turn()
 
     def end_round(self):
-        winnings = self.game.end_round()
-        self.show_round_results(winnings)
+        self.show_round_results(self.game.last_winnings)
         self.update_casino_money()
         self.update_player_money()
-        if self.game.current_round <= 4:
-            self.roll_button.config(state=tk.NORMAL)
+        if not self.game.is_over():
+            self.view.set(self.roll_button, state=tk.NORMAL)
+            self.schedule_ai_turn()
         else:
             self.end_game()
 
+    def schedule_ai_turn(self):
+        if self.game.current_player in self.ai_players:
+            self.view.set(self.roll_button, state=tk.DISABLED)
+            self.master.after(300, self.play_ai_turn)
+
+    def play_ai_turn(self):
+        if not self.game or self.game.current_player not in self.ai_players:
+            return
+        if not self.game.play_round():
+            self.end_game()
+            return
+        self.update_info()
+        face = self.ai.choose(self.game)
+        self.view.set(self.ai_label, text=f"AI 플레이어 {self.game.current_player + 1}: {face}번 카지노에 배치 "
+                                  f"({search_summary(self.ai.last_stats)})")
+        self.place_dice(face, by_ai=True)
+
     def show_round_results(self, winnings):
         result_text = f"라운드 {self.game.current_round - 1} 결과:\n\n"
         for player_id, player_winnings in winnings.items():
@@ -244,32 +187,23 @@ class VegasGameGUI:
 
     def update_info(self):
         player = self.game.players[self.game.current_player]
-        self.info_label.config(text=f"라운드: {self.game.current_round}, 플레이어: {player.id + 1}, 남은 주사위: {player.dice}")
-        
+        self.view.set(self.info_label, text=f"라운드: {self.game.current_round}, 플레이어: {player.id + 1}, 남은 주사위: {player.dice}")
+
         dice_count = player.get_dice_count()
         for i, label in enumerate(self.dice_labels):
-            count = dice_count[i+1]
-            label.config(image=self.dice_images[i], text=f"{i+1}: {count}", compound=tk.BOTTOM)
+            self.view.set(label, text=f"{i+1}: {dice_count[i+1]}")
 
     def update_casino_money(self):
         for i, casino in enumerate(self.game.casinos):
             money_str = ", ".join([f"${m}" for m in casino.money])
-            self.casino_money_labels[i].config(text=f" {money_str}", image=self.money_image, compound=tk.LEFT)
-            
+            self.view.set(self.casino_money_labels[i], text=f" {money_str}")
+
             dice_str = ", ".join([f"P{p+1}: {c}" for p, c in casino.dice.items()])
-            self.casino_dice_labels[i].config(text=f"주사위: {dice_str}")
+            self.view.set(self.casino_dice_labels[i], text=f"주사위: {dice_str}")
 
     def update_player_money(self):
-        for label in self.player_money_labels:
-            label.destroy()
-        self.player_money_labels.clear()
-
-        for player in self.game.players:
-            label = tk.Label(self.player_money_frame, text=f"플레이어 {player.id + 1}: ${player.money}", image=self.money_image, compound=tk.LEFT)
-            label.pack(side=tk.LEFT, padx=5)
-            self.player_money_labels.append(label)
-        
-        self.player_money_frame.update()
+        for player, label in zip(self.game.players, self.player_money_labels):
+            self.view.set(label, text=f"플레이어 {player.id + 1}: ${player.money}")
 
     def end_game(self):
         winner = self.game.get_winner()
@@ -334,7 +268,13 @@ class VegasGameGUI:
         draw.text(((30-w)/2, (20-h)/2), text, fill='black', font=font)
         return ImageTk.PhotoImage(image)
 
+metrics.instrument(VegasGameGUI, "update_info", "tk_update_info")
+metrics.instrument(VegasGameGUI, "update_casino_money", "tk_update_casinos")
+metrics.instrument(VegasGameGUI, "update_player_money", "tk_update_players")
+metrics.instrument(WidgetView, "flush", "tk_flush")
+
 if __name__ == "__main__":
+    metrics.setup()
     root = tk.Tk()
     app = VegasGameGUI(root)
     root.mainloop()
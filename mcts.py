@@ -0,0 +1,131 @@
+import math
+import time
+from rng import GameRng
+from state import GameState, random_playout
+from opening_book import book_move
+from endgame import EndgameSolver
+
+
+class Node:
+    __slots__ = ("children", "visits", "available", "rewards")
+
+    def __init__(self, num_players):
+        self.children = {}
+        self.visits = 0
+        self.available = 0
+        self.rewards = [0.0] * num_players
+
+
+def outcome(state):
+    # 승자 1점, 나머지 0점 (VegasGame.get_winner 와 같은 동점 처리)
+    rewards = [0.0] * state.num_players
+    rewards[state.get_winner()] = 1.0
+    return rewards
+
+
+class MCTSPlayer:
+    # 주사위 결과와 새 돈 카드는 매 반복마다 다시 뽑는 open-loop MCTS.
+    # 노드는 행동 순서로만 구분하고, 뽑힌 주사위에서 둘 수 없는 면은 그 반복에서 건너뛴다.
+    # 마지막 라운드 막판은 endgame 풀이기가 정확히 풀고, 풀 수 없는 크기면 MCTS 로 돌아간다
+    def __init__(self, time_budget=0.2, exploration=0.7, playout=random_playout, rng=None, use_book=True,
+                 endgame=True):
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.playout = playout
+        self.use_book = use_book
+        self.endgame = EndgameSolver() if endgame else None
+        self.rng = rng or GameRng()
+        self.last_stats = {}
+
+    def choose(self, game):
+        root_state = game if isinstance(game, GameState) else GameState.from_game(game)
+        legal = root_state.legal_faces()
+        if len(legal) == 1:
+            self.last_stats = {"playouts": 0, "elapsed": 0.0, "playouts_per_sec": 0.0}
+            return legal[0]
+        face = book_move(root_state) if self.use_book else None
+        if face is not None:
+            self.last_stats = {"playouts": 0, "elapsed": 0.0, "playouts_per_sec": 0.0, "book": True}
+            return face
+        # 풀이기와 MCTS 가 한 수의 time_budget 을 함께 쓴다. 풀이기가 포기하면 남은 시간만 MCTS 에 준다
+        start = time.perf_counter()
+        deadline = start + self.time_budget
+        face = self.endgame.choose(root_state, deadline) if self.endgame else None
+        if face is not None:
+            self.last_stats = {"playouts": 0, "playouts_per_sec": 0.0, "endgame": True, **self.endgame.last_stats}
+            return face
+
+        search_start = time.perf_counter()
+        root = Node(root_state.num_players)
+        playouts = 0
+        while True:
+            self.search(root, root_state.clone())
+            playouts += 1
+            if time.perf_counter() >= deadline:
+                break
+        now = time.perf_counter()
+        elapsed = now - start
+        search_time = now - search_start
+
+        self.last_stats = {
+            "playouts": playouts,
+            "elapsed": elapsed,
+            "playouts_per_sec": playouts / search_time if search_time else 0.0,
+        }
+        return max(legal, key=lambda face: root.children[face].visits if face in root.children else -1)
+
+    def search(self, root, state):
+        rng = self.rng
+        path = [root]
+        node = root
+        while not state.is_over():
+            if not state.has_rolled():
+                state.roll_dice(rng)
+            legal = state.legal_faces()
+            player = state.current_player
+            untried = [face for face in legal if face not in node.children]
+            for face in legal:
+                child = node.children.get(face)
+                if child is not None:
+                    child.available += 1
+            if untried:
+                face = rng.choice(untried)
+                child = node.children[face] = Node(state.num_players)
+                child.available = 1
+                state.place_dice(face, rng)
+                path.append(child)
+                break
+            face = max(legal, key=lambda f: self.ucb(node.children[f], player))
+            node = node.children[face]
+            state.place_dice(face, rng)
+            path.append(node)
+
+        rewards = outcome(self.playout(state, rng))
+        for node in path:
+            node.visits += 1
+            for p, reward in enumerate(rewards):
+                node.rewards[p] += reward
+
+    def ucb(self, child, player):
+        return child.rewards[player] / child.visits + \
+            self.exploration * math.sqrt(math.log(child.available) / child.visits)
+
+
+def search_summary(stats):
+    # 화면에 보여 줄 한 줄 요약
+    if stats.get("endgame"):
+        return (f"엔드게임 완전 탐색, {stats['nodes']}노드 {stats['nodes_per_sec']:.0f}노드/초, "
+                f"표 적중률 {stats['hit_rate']:.0%}")
+    if stats.get("book"):
+        return "오프닝 북"
+    return f"{stats['playouts']}회 시뮬레이션, {stats['playouts_per_sec']:.0f}회/초"
+
+
+def play_ai_turn(game, ai, history=None):
+    # 현재 플레이어가 AI 일 때 한 턴(굴리기 + 배치)을 진행한다. history 를 주면 그 기록을 거쳐 둔다
+    moves = game if history is None else history
+    if not getattr(game, "dice_rolled", False) and not moves.play_round():
+        return None
+    face = ai.choose(game)
+    moves.place_dice(face)
+    return face
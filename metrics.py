@@ -0,0 +1,182 @@
+import atexit
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from engine import VegasGame
+
+# 엔진과 세 화면의 핫패스 지연 시간 히스토그램.
+# VEGAS_METRICS=1 일 때만 켜지고, 꺼져 있으면 instrument() 가 함수를 바꾸지 않아 비용이 없다.
+#   VEGAS_METRICS_PORT=9108       -> http://127.0.0.1:9108/metrics 에 Prometheus 텍스트
+#   VEGAS_METRICS_DUMP=metrics.json -> VEGAS_METRICS_INTERVAL 초(기본 10)마다 JSON 으로 저장
+ENABLED = os.environ.get("VEGAS_METRICS", "") not in ("", "0")
+BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0)
+PREFIX = "vegas_"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self.lock:
+            return self.counts[:], self.sum, self.count
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name):
+        hist = self.histograms.get(name)
+        if hist is None:
+            with self.lock:
+                hist = self.histograms.setdefault(name, Histogram())
+        return hist
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    def prometheus_text(self):
+        lines = []
+        for name, hist in sorted(self.histograms.items()):
+            counts, total, count = hist.snapshot()
+            metric = f"{PREFIX}{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for le, n in zip(BUCKETS + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+            lines.append(f"{metric}_sum {total}")
+            lines.append(f"{metric}_count {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        data = {}
+        for name, hist in sorted(self.histograms.items()):
+            counts, total, count = hist.snapshot()
+            data[name] = {"count": count, "sum": total, "mean": total / count if count else 0.0,
+                          "buckets": dict(zip(map(str, BUCKETS + ("+Inf",)), counts))}
+        return {"time": time.time(), "histograms": data}
+
+    def dump(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1)
+        os.replace(tmp, path)
+
+
+REGISTRY = Registry()
+
+
+def instrument(owner, attr, name):
+    # owner.attr (클래스 메서드나 모듈 함수) 를 시간을 재는 함수로 바꾼다. 꺼져 있으면 아무것도 안 한다
+    if not ENABLED:
+        return
+    fn = getattr(owner, attr)
+    if getattr(fn, "metrics_name", None) == name:
+        return  # Streamlit 은 매 rerun 마다 스크립트를 다시 실행하므로 두 번 감싸지 않는다
+    hist = REGISTRY.histogram(name)
+    clock = time.perf_counter
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            hist.observe(clock() - start)
+
+    timed.metrics_name = name
+    setattr(owner, attr, timed)
+
+
+class Phases:
+    # 스크립트 중간중간 phase("이름") 를 부르면 앞 표시부터 걸린 시간을 prefix_이름 에 기록한다
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.last = time.perf_counter()
+
+    def __call__(self, name):
+        now = time.perf_counter()
+        REGISTRY.observe(f"{self.prefix}_{name}", now - self.last)
+        self.last = now
+
+
+def _no_phase(name):
+    pass
+
+
+def phases(prefix):
+    return Phases(prefix) if ENABLED else _no_phase
+
+
+def serve(port, host="127.0.0.1"):
+    # http.server 는 무거워서 내보낼 때만 import 한다 (metrics 는 모든 화면과 서버가 import 한다)
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = REGISTRY.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_dump(path, interval=10.0):
+    def loop():
+        while True:
+            time.sleep(interval)
+            REGISTRY.dump(path)
+
+    threading.Thread(target=loop, name="metrics-dump", daemon=True).start()
+    atexit.register(REGISTRY.dump, path)
+
+
+def install_engine():
+    instrument(VegasGame, "play_round", "engine_roll")
+    instrument(VegasGame, "place_dice", "engine_place")  # 라운드 정산이 일어난 배치는 end_round 시간도 포함
+    instrument(VegasGame, "end_round", "engine_round_end")
+
+
+_started = False
+
+
+def setup():
+    # 화면과 서버의 시작 지점에서 부른다. 여러 번 불러도 한 번만 설치된다
+    global _started
+    if not ENABLED or _started:
+        return
+    _started = True
+    install_engine()
+    port = os.environ.get("VEGAS_METRICS_PORT")
+    if port:
+        serve(int(port))
+    path = os.environ.get("VEGAS_METRICS_DUMP")
+    if path:
+        start_dump(path, float(os.environ.get("VEGAS_METRICS_INTERVAL", "10")))
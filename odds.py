@@ -0,0 +1,114 @@
+import functools
+import math
+
+# 주사위 k 개(일반 0-8, 딜러 0-4)의 결과 분포는 고정이라 처음 쓸 때 한 번만 계산해 둔다.
+MAX_DICE = 8
+MAX_DEALER_DICE = 4
+
+
+def _compositions(count, bins=6):
+    if bins == 1:
+        yield (count,)
+        return
+    for first in range(count, -1, -1):
+        for rest in _compositions(count - first, bins - 1):
+            yield (first,) + rest
+
+
+@functools.lru_cache(maxsize=None)
+def roll_table(count):
+    # count 개 주사위의 모든 6칸 히스토그램과 그 확률 (bytes, float) 목록
+    if not 0 <= count <= MAX_DICE:
+        raise ValueError(f"count must be between 0 and {MAX_DICE}")
+    total = 6 ** count
+    table = []
+    for hist in _compositions(count):
+        ways = math.factorial(count)
+        for n in hist:
+            ways //= math.factorial(n)
+        table.append((bytes(hist), ways / total))
+    return tuple(table)
+
+
+def roll_outcomes(count, dealer_count=0):
+    # 일반 주사위와 딜러 주사위는 따로 굴리므로 두 표의 곱이 결합 분포다
+    dealer_table = roll_table(dealer_count)
+    for hist, p in roll_table(count):
+        for dealer_hist, q in dealer_table:
+            yield hist, dealer_hist, p * q
+
+
+def _binomial(count, k):
+    return math.comb(count, k) * 5 ** (count - k) / 6 ** count
+
+
+@functools.lru_cache(maxsize=None)
+def face_count_table(count, dealer_count=0):
+    # 한 면(=한 카지노)에 나오는 (일반, 딜러) 주사위 개수의 분포로, roll_table 의 한 칸 주변분포다.
+    # 둘 다 0 인 경우는 뺀다.
+    return tuple((a, b, _binomial(count, a) * _binomial(dealer_count, b))
+                 for a in range(count + 1) for b in range(dealer_count + 1) if a or b)
+
+
+def casino_payout(dice, dealer_dice, money, player_id):
+    # Casino.distribute_money 와 같은 규칙으로 player_id 가 받을 금액
+    if dealer_dice >= max(dice.values(), default=0):
+        return 0
+    seen = set()
+    rank = 0
+    for pid, count in sorted(dice.items(), key=lambda x: x[1], reverse=True):
+        if count <= dealer_dice or count in seen:
+            continue
+        seen.add(count)
+        if pid == player_id:
+            return money[rank] if rank < len(money) else 0
+        rank += 1
+    return 0
+
+
+def _next_opponent(game):
+    n = game.num_players
+    for step in range(1, n):
+        player = game.players[(game.current_player + step) % n]
+        if player.dice or getattr(player, "dealer_dice", 0):
+            return player
+    return None
+
+
+def placement_hint(game):
+    # 현재 굴린 주사위의 각 면을 배치했을 때 그 카지노에서 늘어나는 기대 수익.
+    # 다음 차례 상대가 같은 면을 굴리면 그 주사위를 모두 그 카지노에 놓는다고 보고 평균을 낸다.
+    player = game.players[game.current_player]
+    regular = [0] * 7
+    dealer = [0] * 7
+    for face in player.current_roll:
+        regular[face] += 1
+    for face in getattr(player, "current_dealer_roll", ()):
+        dealer[face] += 1
+
+    opponent = _next_opponent(game)
+    hints = {}
+    for face in range(1, 7):
+        if not (regular[face] or dealer[face]):
+            continue
+        casino = game.casinos[face - 1]
+        casino_dealer = getattr(casino, "dealer_dice", 0)
+        before = casino_payout(casino.dice, casino_dealer, casino.money, player.id)
+
+        dice = dict(casino.dice)
+        if regular[face]:
+            dice[player.id] = dice.get(player.id, 0) + regular[face]
+        dealer_after = casino_dealer + dealer[face]
+        after = casino_payout(dice, dealer_after, casino.money, player.id)
+
+        if opponent is not None and after:
+            table = face_count_table(opponent.dice, getattr(opponent, "dealer_dice", 0))
+            threatened = 0.0
+            for a, b, p in table:
+                reply = dict(dice)
+                if a:
+                    reply[opponent.id] = reply.get(opponent.id, 0) + a
+                threatened += p * (after - casino_payout(reply, dealer_after + b, casino.money, player.id))
+            after -= threatened
+        hints[face] = after - before
+    return hints
@@ -0,0 +1,157 @@
+import functools
+import json
+import os
+import time
+from engine import CLASSIC, DEALER
+from odds import roll_outcomes
+from rng import DEFAULT_RNG, GameRng
+
+# 1라운드 첫 수는 카지노가 모두 비어 있어서 주사위 결과만으로 미리 풀어 둘 수 있다.
+# 카지노 번호는 서로 바꿔도 같은 상황이므로 (일반, 딜러) 개수 쌍의 묶음으로 상태를 줄이고,
+# 그 묶음마다 가장 좋은 쌍을 저장한다. 돈 카드는 무작위로 나눠 평균을 낸다 (batch_sim 으로 무작위 대국).
+# 시뮬레이션 잡음으로 고른 수가 탐색을 덮어쓰지 않도록, 다른 후보보다 뚜렷하게 나은 쌍만 저장한다.
+# 책을 만든 규칙이 바뀌면 올려서 예전 규칙으로 만든 책을 읽지 않게 한다.
+# 2: 카지노 돈을 큰 지폐부터 배당
+BOOK_VERSION = 2
+BATCH = 2000  # 후보마다 한 번에 돌리는 판 수
+Z = 3.0  # 1등과 이만큼의 표준오차 넘게 차이 나면 후보에서 뺀다
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.json")
+VARIANTS = {"classic": CLASSIC, "dealer": DEALER}
+
+
+def canonical(roll, dealer_roll):
+    return tuple(sorted(((roll[i], dealer_roll[i]) for i in range(6) if roll[i] or dealer_roll[i]), reverse=True))
+
+
+def key_string(key):
+    return ",".join(f"{r}.{d}" for r, d in key)
+
+
+def book_name(variant, num_players):
+    return f"{'-'.join(map(str, variant))}/{num_players}"
+
+
+def is_opening(state):
+    return state.current_round == 1 and state.turn == 0 and not any(state.placed) and not any(state.dealer_placed)
+
+
+def evaluate(num_players, variant, key, pairs, rollouts, rng):
+    # key 상황에서 pairs 의 쌍마다, 그 쌍을 놓고 나머지를 무작위로 둔 rollouts 판 중 첫 플레이어가 이긴 횟수.
+    # 후보를 모두 한 BatchVegas 에 넣어 한 번에 돌린다. numpy 는 책을 만들 때만 쓰므로 여기서 import 한다
+    import numpy as np
+    from batch_sim import BatchVegas, random_policy
+    roll = np.zeros(6, dtype=np.int16)
+    dealer_roll = np.zeros(6, dtype=np.int16)
+    for face, (r, d) in enumerate(key):
+        roll[face], dealer_roll[face] = r, d
+    faces = np.repeat([key.index(pair) for pair in pairs], rollouts)
+    n = faces.size
+    sim = BatchVegas(n, num_players, variant, seed=rng.getrandbits(64))
+    sim.place(np.arange(n), faces, np.broadcast_to(roll, (n, 6)), np.broadcast_to(dealer_roll, (n, 6)))
+    won = sim.run(random_policy) == 0
+    return won.reshape(len(pairs), rollouts).sum(1).tolist()
+
+
+def race(num_players, variant, key, rollouts, rng):
+    # 남은 후보를 BATCH 판씩 함께 돌리고, 1등보다 Z 표준오차 넘게 뒤진 후보는 뺀다.
+    # 하나만 남으면 (쌍, 승률), 후보마다 rollouts 판을 돌려도 갈리지 않으면 None
+    wins = dict.fromkeys(set(key), 0)
+    alive = sorted(wins)
+    n = 0
+    while len(alive) > 1 and n < rollouts:
+        for pair, w in zip(alive, evaluate(num_players, variant, key, alive, BATCH, rng)):
+            wins[pair] += w
+        n += BATCH
+        rate = {pair: wins[pair] / n for pair in alive}
+        best = max(rate.values())
+        alive = [pair for pair in alive
+                 if best - rate[pair] <= Z * ((best * (1 - best) + rate[pair] * (1 - rate[pair])) / n) ** 0.5]
+    if len(alive) != 1 or n == 0:
+        return None  # 갈리지 않았거나 고를 것이 하나뿐이면 책에 넣지 않고 탐색에 맡긴다
+    return alive[0], wins[alive[0]] / n
+
+
+def build_book(num_players, variant, rollouts=16000, rng=DEFAULT_RNG, progress=None):
+    keys = sorted({canonical(roll, dealer_roll)
+                   for roll, dealer_roll, _ in roll_outcomes(variant.dice_per_player, variant.dealer_dice)})
+    entries = {}
+    for i, key in enumerate(keys):
+        result = race(num_players, variant, key, rollouts, rng)
+        if result is not None:
+            (r, d), p = result
+            entries[key_string(key)] = [r, d, round(p, 4)]
+        if progress:
+            progress(i + 1, len(keys))
+    return entries
+
+
+class OpeningBook:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def lookup(self, state):
+        entry = self.entries.get(key_string(canonical(state.roll, state.dealer_roll)))
+        if entry is None:
+            return None
+        r, d = entry[0], entry[1]
+        faces = [face for face in range(1, 7) if state.roll[face - 1] == r and state.dealer_roll[face - 1] == d]
+        # 같은 쌍이 여러 면에 있으면 돈이 많은 카지노를 고른다
+        return max(faces, key=lambda face: sum(state.casino_money[face - 1])) if faces else None
+
+
+@functools.lru_cache(maxsize=None)
+def load_books(path=DEFAULT_PATH):
+    # 처음 쓸 때 한 번만 읽는다. 파일이 없거나 버전이 다르면 빈 책.
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != BOOK_VERSION:
+        return {}
+    return {name: OpeningBook(entries) for name, entries in data["books"].items()}
+
+
+def book_move(state, path=DEFAULT_PATH):
+    if not is_opening(state):
+        return None
+    book = load_books(path).get(book_name(state.variant, state.num_players))
+    return book.lookup(state) if book else None
+
+
+def main():
+    import argparse  # MCTS 를 쓰는 워커가 CLI 모듈까지 불러오지 않게 여기서 import 한다
+    parser = argparse.ArgumentParser(description="라스베가스 1라운드 오프닝 북 생성기")
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 3, 4, 5])
+    parser.add_argument("--variant", choices=list(VARIANTS), nargs="+", default=list(VARIANTS))
+    parser.add_argument("--rollouts", type=int, default=16000, help="상황과 수마다 시뮬레이션할 최대 게임 수")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    rng = GameRng(args.seed)
+    books = {}
+    if os.path.exists(args.out):
+        with open(args.out, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == BOOK_VERSION:
+            books = data["books"]
+    for variant_name in args.variant:
+        variant = VARIANTS[variant_name]
+        for num_players in args.players:
+            start = time.perf_counter()
+            name = book_name(variant, num_players)
+
+            def progress(done, total):
+                print(f"\r{variant_name} {num_players}p: {done}/{total}", end="", flush=True)
+
+            books[name] = build_book(num_players, variant, args.rollouts, rng, progress)
+            print(f" ({time.perf_counter() - start:.0f}s)")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"version": BOOK_VERSION, "rollouts": args.rollouts, "books": books}, f,
+                  separators=(",", ":"), sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import random
+
+# 게임마다 주입하는 난수 생성기. 같은 seed 면 같은 게임이 나오고,
+# spawn() 으로 워커나 테이블마다 겹치지 않는 하위 스트림을 만든다.
+# 주사위는 한 번에 BLOCK_SIZE 바이트씩 만들어 두고 버퍼에서 꺼내 쓴다.
+BLOCK_SIZE = 4096
+# 0-251 은 주사위 눈(1-6)으로 바꾸고 252-255 는 버려서 6 으로 나눌 때 치우치지 않게 한다
+_FACE_TABLE = bytes(i % 6 + 1 for i in range(252)) + bytes(4)
+_REJECTED = bytes(range(252, 256))
+
+
+def derive_seed(seed, *path):
+    # (seed, 경로) 로 64비트 seed 를 만든다. 이벤트 로그 헤더에 그대로 들어가는 크기다
+    data = repr((seed,) + path).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def fresh_seed():
+    return int.from_bytes(os.urandom(8), "little")
+
+
+class GameRng(random.Random):
+    # random.Random 을 그대로 상속하므로 shuffle, choice 등도 같은 스트림에서 나온다
+    def __init__(self, seed=None, block_size=BLOCK_SIZE):
+        self.root_seed = fresh_seed() if seed is None else seed
+        self.block_size = block_size
+        self.faces = b""
+        self.pos = 0
+        super().__init__(self.root_seed)
+
+    def spawn(self, *path):
+        return GameRng(derive_seed(self.root_seed, *path), self.block_size)
+
+    def roll(self, count):
+        # count 개의 주사위 눈(1-6)을 bytes 로 돌려준다
+        pos = self.pos
+        if pos + count > len(self.faces):
+            faces = self.faces[pos:]
+            while len(faces) < count:
+                faces += self.randbytes(self.block_size).translate(_FACE_TABLE, _REJECTED)
+            self.faces = faces
+            pos = 0
+        self.pos = pos + count
+        return self.faces[pos:pos + count]
+
+    def roll_histogram(self, count):
+        # 눈별 개수 (GameState 용). 0번 칸은 쓰지 않는다
+        hist = bytearray(7)
+        for face in self.roll(count):
+            hist[face] += 1
+        return hist[1:]
+
+    def __reduce__(self):
+        # 프로세스 풀로 넘길 때도 seed 와 남은 버퍼까지 이어진다
+        return GameRng, (self.root_seed, self.block_size), (self.getstate(), self.faces, self.pos)
+
+    def __setstate__(self, state):
+        self.setstate(state[0])
+        self.faces, self.pos = state[1], state[2]
+
+
+DEFAULT_RNG = GameRng()
@@ -0,0 +1,301 @@
+import argparse
+import asyncio
+import itertools
+import json
+import signal
+import sys
+import time
+from engine import VegasGame, CLASSIC, DEALER
+from eventlog import EventLog
+import metrics
+from rng import GameRng
+
+# 한 프로세스에서 여러 테이블을 돌리는 asyncio 게임 서버.
+# 프로토콜은 줄 단위 JSON: 요청마다 "reply" 또는 "error" 가 순서대로 돌아오고,
+# 테이블 상태가 바뀌면 앉아 있는 모든 플레이어에게 "state" 이벤트를 보낸다.
+VARIANTS = {"classic": CLASSIC, "dealer": DEALER}
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+class Table:
+    def __init__(self, table_id, num_players, variant_name):
+        self.id = table_id
+        self.num_players = num_players
+        self.variant_name = variant_name
+        self.seats = [None] * num_players
+        self.game = None
+        self.last_activity = time.monotonic()
+
+    def open_seat(self):
+        return next((i for i, conn in enumerate(self.seats) if conn is None), None)
+
+    def snapshot(self):
+        game = self.game
+        if game is None:
+            return {"type": "state", "table": self.id, "started": False,
+                    "seated": sum(conn is not None for conn in self.seats), "players": self.num_players}
+        player = game.players[game.current_player]
+        state = {
+            "type": "state", "table": self.id, "started": True, "over": game.is_over(),
+            "round": game.current_round, "current": game.current_player, "rolled": game.dice_rolled,
+            "roll": player.current_roll, "dealer_roll": player.current_dealer_roll,
+            "money": [p.money for p in game.players],
+            "casinos": [[casino.dice.get(i, 0) for i in range(self.num_players)] + [casino.dealer_dice]
+                        for casino in game.casinos],
+        }
+        if game.is_over():
+            state["winner"] = game.get_winner().id
+        return state
+
+
+class Connection:
+    def __init__(self, reader, writer, queue_size):
+        self.reader = reader
+        self.writer = writer
+        # 보낼 메시지를 쌓아 두는 큐. 가득 차면 느린 클라이언트로 보고 연결을 끊는다.
+        self.outbox = asyncio.Queue(queue_size)
+        self.table = None
+        self.seat = None
+        self.closed = False
+
+    def send(self, message):
+        self.send_encoded(encode(message))
+
+    def send_encoded(self, data):
+        # 여러 좌석에 같은 메시지를 보낼 때는 한 번 인코딩한 바이트를 그대로 넘긴다
+        if self.closed:
+            return
+        try:
+            self.outbox.put_nowait(data)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.writer.close()
+
+    async def write_loop(self):
+        try:
+            while not self.closed:
+                # 쌓인 메시지를 한꺼번에 쓰고 drain 은 한 번만 기다린다
+                batch = [await self.outbox.get()]
+                while not self.outbox.empty():
+                    batch.append(self.outbox.get_nowait())
+                self.writer.writelines(batch)
+                await self.writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.close()
+
+
+class GameServer:
+    def __init__(self, max_tables=10000, idle_timeout=60.0, queue_size=64, event_log=None, seed=None):
+        self.max_tables = max_tables
+        # 테이블마다 (서버 seed, 테이블 번호) 로 만든 독립 스트림을 쓴다
+        self.rng = GameRng(seed)
+        self.event_log = event_log
+        self.idle_timeout = idle_timeout
+        self.queue_size = queue_size
+        self.tables = {}
+        self.table_ids = itertools.count(1)
+        self.moves = 0
+        self.connections = 0
+
+    async def serve(self, host="127.0.0.1", port=8765, path=None):
+        if path:
+            server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        reaper = asyncio.create_task(self.reap_idle_tables())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reaper.cancel()
+
+    async def handle(self, reader, writer):
+        conn = Connection(reader, writer, self.queue_size)
+        self.connections += 1
+        writer_task = asyncio.create_task(conn.write_loop())
+        try:
+            while not conn.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    reply = self.dispatch(conn, request)
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"type": "error", "error": str(e)}
+                conn.send(reply)
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(conn)
+            conn.close()
+            writer_task.cancel()
+            self.connections -= 1
+
+    def dispatch(self, conn, request):
+        op = request["op"]
+        if op == "list":
+            return {"type": "reply", "tables": [
+                {"table": t.id, "players": t.num_players, "variant": t.variant_name}
+                for t in self.tables.values() if t.game is None]}
+        if op == "create":
+            return self.create(conn, int(request.get("players", 2)), request.get("variant", "dealer"))
+        if op == "join":
+            return self.join(conn, int(request["table"]))
+        if op == "roll":
+            return self.roll(conn)
+        if op == "place":
+            return self.place(conn, int(request["face"]))
+        if op == "leave":
+            self.leave(conn)
+            return {"type": "reply"}
+        raise ValueError(f"unknown op: {op}")
+
+    def create(self, conn, num_players, variant_name):
+        if conn.table is not None:
+            return {"type": "error", "error": "already seated"}
+        if not 2 <= num_players <= 5 or variant_name not in VARIANTS:
+            return {"type": "error", "error": "bad table settings"}
+        if len(self.tables) >= self.max_tables:
+            return {"type": "error", "error": "server busy"}
+        table = Table(next(self.table_ids), num_players, variant_name)
+        self.tables[table.id] = table
+        return self.join(conn, table.id)
+
+    def join(self, conn, table_id):
+        table = self.tables.get(table_id)
+        if conn.table is not None:
+            return {"type": "error", "error": "already seated"}
+        if table is None or table.game is not None:
+            return {"type": "error", "error": "no such open table"}
+        seat = table.open_seat()
+        table.seats[seat] = conn
+        conn.table, conn.seat = table, seat
+        table.last_activity = time.monotonic()
+        if table.open_seat() is None:
+            rng = self.rng.spawn("table", table.id)
+            log = self.event_log.recorder() if self.event_log is not None else None
+            table.game = VegasGame(table.num_players, VARIANTS[table.variant_name], log=log, rng=rng)
+        self.broadcast(table)
+        return {"type": "reply", "table": table.id, "seat": seat}
+
+    def turn_error(self, conn):
+        table = conn.table
+        if table is None or table.game is None:
+            return "game not started"
+        if table.game.is_over():
+            return "game over"
+        if table.game.current_player != conn.seat:
+            return "not your turn"
+        return None
+
+    def roll(self, conn):
+        error = self.turn_error(conn)
+        if error is None and not conn.table.game.play_round():
+            error = "already rolled"
+        if error:
+            return {"type": "error", "error": error}
+        self.moved(conn.table)
+        return {"type": "reply"}
+
+    def place(self, conn, face):
+        error = self.turn_error(conn)
+        if error is None and not (1 <= face <= 6 and conn.table.game.place_dice(face)):
+            error = "illegal placement"
+        if error:
+            return {"type": "error", "error": error}
+        self.moved(conn.table)
+        return {"type": "reply"}
+
+    def moved(self, table):
+        self.moves += 1
+        table.last_activity = time.monotonic()
+        self.broadcast(table)
+        if table.game.is_over():
+            self.close_table(table)
+
+    def broadcast(self, table):
+        data = encode(table.snapshot())
+        for conn in table.seats:
+            if conn is not None:
+                conn.send_encoded(data)
+
+    def leave(self, conn):
+        table = conn.table
+        if table is None:
+            return
+        conn.table = conn.seat = None
+        if table.game is None:
+            table.seats[table.seats.index(conn)] = None
+            if all(seat is None for seat in table.seats):
+                self.tables.pop(table.id, None)
+            else:
+                self.broadcast(table)
+        else:
+            # 게임 도중 나가면 테이블을 닫는다
+            self.close_table(table, "player left")
+
+    def close_table(self, table, reason=None):
+        self.tables.pop(table.id, None)
+        self.log_abort(table, reason)
+        data = encode({"type": "closed", "table": table.id, "reason": reason}) if reason else None
+        for conn in table.seats:
+            if conn is not None and conn.table is table:
+                if data:
+                    conn.send_encoded(data)
+                conn.table = conn.seat = None
+
+    def log_abort(self, table, reason):
+        # 도중에 닫힌 게임도 재현할 수 있게 지금까지의 기록을 로그에 남긴다
+        game = table.game
+        if game is not None and not game.is_over() and game.log is not None:
+            game.log.abort(reason)
+
+    async def reap_idle_tables(self):
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 5.0))
+            cutoff = time.monotonic() - self.idle_timeout
+            for table in [t for t in self.tables.values() if t.last_activity < cutoff]:
+                self.close_table(table, "idle timeout")
+            if self.event_log is not None:
+                self.event_log.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="라스베가스 게임 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="TCP 대신 사용할 유닉스 소켓 경로")
+    parser.add_argument("--max-tables", type=int, default=10000)
+    parser.add_argument("--idle-timeout", type=float, default=60.0)
+    parser.add_argument("--event-log", help="게임을 기록할 이벤트 로그 파일 (도중에 닫힌 게임 포함)")
+    parser.add_argument("--seed", type=int, default=None, help="같은 seed 면 테이블마다 같은 게임이 나온다")
+    args = parser.parse_args()
+
+    metrics.setup()
+    event_log = EventLog(args.event_log) if args.event_log else None
+    server = GameServer(max_tables=args.max_tables, idle_timeout=args.idle_timeout, event_log=event_log,
+                        seed=args.seed)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # 종료할 때도 남은 로그를 쓴다
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if event_log is not None:
+            for table in server.tables.values():
+                server.log_abort(table, "server shutdown")
+            event_log.close()
+
+
+if __name__ == "__main__":
+    main()
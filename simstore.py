@@ -0,0 +1,243 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import time
+import numpy as np
+from batch_sim import BatchVegas, NUM_CASINOS, random_policy, greedy_policy
+from engine import CLASSIC, DEALER
+from rng import derive_seed
+
+# 대량 시뮬레이션 결과를 열 단위 .npy 파일로 저장하고 memmap 으로 읽는 저장소.
+#   path/meta.json                   설정과 열 스키마
+#   path/chunk-000000/games.money.npy  조각(chunk)마다 표.열 하나가 파일 하나
+# 조각은 워커가 임시 디렉터리에 다 쓴 뒤 이름을 바꿔 내놓으므로, 보이는 조각은 항상 완전하다.
+# 질의는 조각마다 필요한 열만 memmap 으로 열어 벡터 연산으로 집계하므로 전체를 메모리에 올리지 않는다.
+VARIANTS = {"classic": CLASSIC, "dealer": DEALER}
+POLICIES = {"random": random_policy, "greedy": greedy_policy}
+
+# 표 -> 열 -> (dtype, 행 하나의 모양)
+SCHEMA = {
+    # 게임 x 좌석마다 한 행
+    "games": {
+        "game": ("int64", ()),
+        "players": ("int8", ()),
+        "seat": ("int8", ()),
+        "money": ("int64", ()),
+        "cards": ("int16", ()),
+        "won": ("bool", ()),
+    },
+    # 게임 x 라운드 x 좌석마다 한 행
+    "rounds": {
+        "game": ("int64", ()),
+        "round": ("int8", ()),
+        "seat": ("int8", ()),
+        "placed": ("int8", (NUM_CASINOS,)),   # 카지노별로 놓은 일반 주사위
+        "dealer": ("int8", (NUM_CASINOS,)),   # 카지노별 딜러 주사위 (같은 라운드의 좌석끼리 같다)
+        "payout": ("int32", (NUM_CASINOS,)),  # 카지노별로 받은 돈
+    },
+}
+
+
+class ChunkWriter:
+    # BatchVegas(..., log=ChunkWriter(...)) 로 붙이면 라운드가 끝날 때마다 기록을 모은다
+    def __init__(self, path, chunk_id, first_game):
+        self.path = path
+        self.chunk_id = chunk_id
+        self.first_game = first_game
+        self.columns = {table: {name: [] for name in columns} for table, columns in SCHEMA.items()}
+
+    def round_end(self, sim, games, payout):
+        g, p = games.size, sim.num_players
+        rounds = self.columns["rounds"]
+        rounds["game"].append(np.repeat(self.first_game + games, p))
+        rounds["round"].append(np.repeat(sim.current_round[games], p))
+        rounds["seat"].append(np.tile(np.arange(p), g))
+        rounds["placed"].append(sim.placed[games].reshape(g * p, NUM_CASINOS))
+        rounds["dealer"].append(np.repeat(sim.dealer_placed[games], p, axis=0))
+        rounds["payout"].append(payout.reshape(g * p, NUM_CASINOS))
+
+    def game_end(self, sim, games):
+        g, p = games.size, sim.num_players
+        won = np.zeros((g, p), dtype=bool)
+        won[np.arange(g), sim.winners()[games]] = True
+        columns = self.columns["games"]
+        columns["game"].append(np.repeat(self.first_game + games, p))
+        columns["players"].append(np.full(g * p, p))
+        columns["seat"].append(np.tile(np.arange(p), g))
+        columns["money"].append(sim.money[games].ravel())
+        columns["cards"].append(sim.card_count[games].ravel())
+        columns["won"].append(won.ravel())
+
+    def close(self):
+        final = os.path.join(self.path, f"chunk-{self.chunk_id:06d}")
+        tmp = final + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for table, columns in self.columns.items():
+            for name, parts in columns.items():
+                dtype, shape = SCHEMA[table][name]
+                data = np.concatenate(parts).astype(dtype, copy=False) if parts else np.empty((0,) + shape, dtype)
+                np.save(os.path.join(tmp, f"{table}.{name}.npy"), data)
+        if os.path.exists(final):
+            shutil.rmtree(final)  # 게임 수가 모자라 다시 돌린 조각
+        os.replace(tmp, final)
+        return final
+
+
+def simulate_chunk(task):
+    path, chunk_id, chunk_size, games, config = task
+    writer = ChunkWriter(path, chunk_id, chunk_id * chunk_size)
+    sim = BatchVegas(games, config["players"], VARIANTS[config["variant"]],
+                     seed=derive_seed(config["seed"], "chunk", chunk_id), log=writer)
+    sim.run(POLICIES[config["policy"]])
+    writer.close()
+    return chunk_id
+
+
+class SimStore:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+    @classmethod
+    def create(cls, path, config, chunk_size):
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        meta = {"config": config, "chunk_size": chunk_size,
+                "schema": {table: {name: [dtype, list(shape)] for name, (dtype, shape) in columns.items()}
+                           for table, columns in SCHEMA.items()}}
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                if json.load(f) != meta:
+                    raise ValueError(f"{path} was made with different settings")
+        else:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=1)
+        return cls(path)
+
+    def chunk_ids(self):
+        return sorted(int(name[6:]) for name in os.listdir(self.path)
+                      if name.startswith("chunk-") and not name.endswith(".tmp"))
+
+    def column(self, chunk_id, table, name):
+        return np.load(os.path.join(self.path, f"chunk-{chunk_id:06d}", f"{table}.{name}.npy"), mmap_mode="r")
+
+    def scan(self, table, *names):
+        # 조각마다 {열 이름: memmap} 을 돌려준다
+        for chunk_id in self.chunk_ids():
+            yield {name: self.column(chunk_id, table, name) for name in names}
+
+    def chunk_games(self, chunk_id):
+        return len(self.column(chunk_id, "games", "game")) // self.meta["config"]["players"]
+
+    def rows(self, table):
+        return sum(len(self.column(chunk_id, table, "game")) for chunk_id in self.chunk_ids())
+
+
+def fill(store, games, workers=None, report=None):
+    # 아직 없거나 게임 수가 모자란 조각만 돌리므로 중간에 멈춰도 다시 부르면 이어서 채운다.
+    # 마지막 조각은 남은 게임 수만큼만 돌리고, 나중에 games 를 늘려 부르면 그 조각을 다시 돌린다
+    chunk_size = store.meta["chunk_size"]
+    done = set(store.chunk_ids())
+    tasks = []
+    for i in range(-(-games // chunk_size)):
+        count = min(chunk_size, games - i * chunk_size)
+        if i not in done or store.chunk_games(i) < count:
+            tasks.append((store.path, i, chunk_size, count, store.meta["config"]))
+    with multiprocessing.Pool(workers) as pool:
+        for chunk_id in pool.imap_unordered(simulate_chunk, tasks):
+            if report:
+                report(chunk_id)
+    return store
+
+
+def win_rate_by_seat(store):
+    num_players = store.meta["config"]["players"]
+    seats = np.zeros(num_players, dtype=np.int64)
+    wins = np.zeros(num_players, dtype=np.int64)
+    for cols in store.scan("games", "seat", "won"):
+        seats += np.bincount(cols["seat"], minlength=num_players)
+        wins += np.bincount(cols["seat"], weights=cols["won"], minlength=num_players).astype(np.int64)
+    return wins / np.maximum(seats, 1)
+
+
+def money_by_seat(store):
+    num_players = store.meta["config"]["players"]
+    seats = np.zeros(num_players, dtype=np.int64)
+    total = np.zeros(num_players)
+    for cols in store.scan("games", "seat", "money"):
+        seats += np.bincount(cols["seat"], minlength=num_players)
+        total += np.bincount(cols["seat"], weights=cols["money"], minlength=num_players)
+    return total / np.maximum(seats, 1)
+
+
+def payout_by_round(store):
+    # (라운드, 카지노) 마다 좌석 하나가 받은 평균 금액
+    rounds = store.meta["config"]["rounds"]
+    rows = np.zeros(rounds, dtype=np.int64)
+    total = np.zeros((rounds, NUM_CASINOS))
+    for cols in store.scan("rounds", "round", "payout"):
+        r = cols["round"].astype(np.intp) - 1
+        rows += np.bincount(r, minlength=rounds)
+        payout = np.asarray(cols["payout"])
+        for c in range(NUM_CASINOS):
+            total[:, c] += np.bincount(r, weights=payout[:, c], minlength=rounds)
+    return total / np.maximum(rows, 1)[:, None]
+
+
+def dealer_block_rate(store):
+    # 카지노별로, 주사위를 놓은 좌석이 딜러 주사위에 막혀 돈을 못 받은 비율
+    placed_rows = np.zeros(NUM_CASINOS, dtype=np.int64)
+    blocked = np.zeros(NUM_CASINOS, dtype=np.int64)
+    for cols in store.scan("rounds", "placed", "dealer"):
+        placed = np.asarray(cols["placed"])
+        has_dice = placed > 0
+        placed_rows += has_dice.sum(0)
+        blocked += (has_dice & (placed <= cols["dealer"])).sum(0)
+    return blocked / np.maximum(placed_rows, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시뮬레이션 결과 저장소")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sim = sub.add_parser("simulate", help="조각 단위로 시뮬레이션해 저장 (이어 돌리기 가능)")
+    sim.add_argument("path")
+    sim.add_argument("--games", type=int, default=1000000, help="전체 게임 수")
+    sim.add_argument("--players", type=int, default=4)
+    sim.add_argument("--variant", choices=list(VARIANTS), default="dealer")
+    sim.add_argument("--policy", choices=list(POLICIES), default="random")
+    sim.add_argument("--seed", type=int, default=0)
+    sim.add_argument("--chunk-size", type=int, default=50000)
+    sim.add_argument("--workers", type=int, default=None, help="기본값은 CPU 코어 수")
+    query = sub.add_parser("query", help="저장된 결과 집계")
+    query.add_argument("path")
+    query.add_argument("what", choices=["seats", "payout", "dealer"])
+    args = parser.parse_args()
+
+    if args.command == "simulate":
+        config = {"players": args.players, "variant": args.variant, "policy": args.policy, "seed": args.seed,
+                  "rounds": VARIANTS[args.variant].rounds}
+        store = SimStore.create(args.path, config, args.chunk_size)
+        start = time.perf_counter()
+        fill(store, args.games, args.workers, report=lambda i: print(f"chunk {i} done", flush=True))
+        elapsed = time.perf_counter() - start
+        print(f"{len(store.chunk_ids())} chunks, {store.rows('games') // args.players:,} games ({elapsed:.1f}s)")
+        return
+
+    store = SimStore(args.path)
+    np.set_printoptions(precision=3, suppress=True, linewidth=120)
+    if args.what == "seats":
+        for seat, (rate, money) in enumerate(zip(win_rate_by_seat(store), money_by_seat(store))):
+            print(f"Seat {seat + 1}: win {rate:.3f}, avg ${money:,.0f}")
+    elif args.what == "payout":
+        for r, row in enumerate(payout_by_round(store)):
+            print(f"Round {r + 1}: " + "  ".join(f"C{c + 1} ${v:,.0f}" for c, v in enumerate(row)))
+    else:
+        print("  ".join(f"C{c + 1} {v:.3f}" for c, v in enumerate(dealer_block_rate(store))))
+
+
+if __name__ == "__main__":
+    main()
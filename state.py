@@ -0,0 +1,271 @@
+import hashlib
+from engine import DEALER, MoneyDeck, VegasGame
+from rng import DEFAULT_RNG
+
+# 탐색용 게임 상태: VegasGame 과 같은 규칙을 __slots__ 와 고정 크기 배열로 표현해 clone() 이 싸다.
+NUM_CASINOS = 6
+NOT_PLACED = 255
+
+
+def deal_money(rng=DEFAULT_RNG, funding=DEALER.casino_funding):
+    # VegasGame 과 같은 순서로 나누고, 카지노마다 큰 지폐가 앞에 온다
+    deck = MoneyDeck()
+    deck.shuffle(rng)
+    return tuple(tuple(deck.deal(funding)) for _ in range(NUM_CASINOS))
+
+
+def roll_histogram(count, rng=DEFAULT_RNG):
+    return rng.roll_histogram(count)
+
+
+class GameState:
+    __slots__ = ("variant", "num_players", "num_dice", "num_dealer_dice", "rounds",
+                 "current_round", "start_player", "current_player", "turn",
+                 "placed", "first_placed", "dealer_placed", "casino_money",
+                 "dice", "dealer_dice", "money", "card_count", "roll", "dealer_roll")
+
+    def __init__(self, num_players, variant=DEALER, rng=DEFAULT_RNG):
+        self.variant = variant
+        self.num_players = num_players
+        self.num_dice = variant.dice_per_player
+        self.num_dealer_dice = variant.dealer_dice
+        self.rounds = variant.rounds
+        self.current_round = 1
+        self.start_player = 0
+        self.current_player = 0
+        self.turn = 0
+        # placed / first_placed 는 카지노 순서대로 [카지노 * num_players + 플레이어]
+        self.placed = bytearray(NUM_CASINOS * num_players)
+        self.first_placed = bytearray([NOT_PLACED]) * (NUM_CASINOS * num_players)
+        self.dealer_placed = bytearray(NUM_CASINOS)
+        self.casino_money = deal_money(rng, variant.casino_funding)
+        self.dice = bytearray([self.num_dice]) * num_players
+        self.dealer_dice = bytearray([self.num_dealer_dice]) * num_players
+        self.money = [0] * num_players
+        self.card_count = bytearray(num_players)
+        self.roll = bytearray(6)
+        self.dealer_roll = bytearray(6)
+
+    def clone(self):
+        other = GameState.__new__(GameState)
+        other.variant = self.variant
+        other.num_players = self.num_players
+        other.num_dice = self.num_dice
+        other.num_dealer_dice = self.num_dealer_dice
+        other.rounds = self.rounds
+        other.current_round = self.current_round
+        other.start_player = self.start_player
+        other.current_player = self.current_player
+        other.turn = self.turn
+        other.placed = self.placed[:]
+        other.first_placed = self.first_placed[:]
+        other.dealer_placed = self.dealer_placed[:]
+        other.casino_money = self.casino_money  # 튜플이라 공유해도 된다
+        other.dice = self.dice[:]
+        other.dealer_dice = self.dealer_dice[:]
+        other.money = self.money[:]
+        other.card_count = self.card_count[:]
+        other.roll = self.roll[:]
+        other.dealer_roll = self.dealer_roll[:]
+        return other
+
+    def key(self):
+        # 첫 배치 순서는 같은 카지노 안의 상대 순서만 의미가 있어 순위로 바꿔 넣는다
+        ranks = bytearray(len(self.first_placed))
+        p = self.num_players
+        for c in range(NUM_CASINOS):
+            row = self.first_placed[c * p:(c + 1) * p]
+            for rank, i in enumerate(sorted(range(p), key=row.__getitem__)):
+                ranks[c * p + i] = rank if row[i] != NOT_PLACED else NOT_PLACED
+        header = bytes((self.num_players, self.num_dice, self.num_dealer_dice, self.rounds,
+                        self.current_round, self.start_player, self.current_player))
+        money = b"".join(m.to_bytes(4, "little") for m in self.money)
+        stacks = b"".join(bytes([len(stack)]) + bytes(card // 10000 for card in stack)
+                          for stack in self.casino_money)
+        return b"|".join((header, bytes(self.placed), bytes(ranks), bytes(self.dealer_placed),
+                          stacks, bytes(self.dice), bytes(self.dealer_dice), money,
+                          bytes(self.card_count), bytes(self.roll), bytes(self.dealer_roll)))
+
+    def state_hash(self):
+        # 프로세스마다 바뀌는 hash() 대신 고정된 64비트 해시
+        return int.from_bytes(hashlib.blake2b(self.key(), digest_size=8).digest(), "little")
+
+    def __hash__(self):
+        return self.state_hash()
+
+    def __eq__(self, other):
+        return isinstance(other, GameState) and self.key() == other.key()
+
+    def is_over(self):
+        return self.current_round > self.rounds
+
+    def casino_dice(self, casino_index):
+        p = self.num_players
+        return self.placed[(casino_index - 1) * p:casino_index * p]
+
+    def has_rolled(self):
+        return any(self.roll) or any(self.dealer_roll)
+
+    def roll_dice(self, rng=DEFAULT_RNG):
+        p = self.current_player
+        self.roll = roll_histogram(self.dice[p], rng)
+        self.dealer_roll = roll_histogram(self.dealer_dice[p], rng)
+
+    def set_roll(self, roll, dealer_roll=(0,) * 6):
+        self.roll = bytearray(roll)
+        self.dealer_roll = bytearray(dealer_roll)
+
+    def legal_faces(self):
+        return [face for face in range(1, 7) if self.roll[face - 1] or self.dealer_roll[face - 1]]
+
+    def place_dice(self, casino_index, rng=DEFAULT_RNG):
+        face = casino_index - 1
+        regular = self.roll[face]
+        dealer = self.dealer_roll[face]
+        if not (regular or dealer):
+            return False
+        p = self.current_player
+        slot = face * self.num_players + p
+        if regular and not self.placed[slot]:
+            self.first_placed[slot] = self.turn
+        self.placed[slot] += regular
+        self.dealer_placed[face] += dealer
+        self.dice[p] -= regular
+        self.dealer_dice[p] -= dealer
+        self.roll = bytearray(6)
+        self.dealer_roll = bytearray(6)
+        self.turn += 1
+        self.next_player(rng)
+        return True
+
+    def next_player(self, rng=DEFAULT_RNG):
+        n = self.num_players
+        for step in range(1, n + 1):
+            p = (self.current_player + step) % n
+            if self.dice[p] or self.dealer_dice[p]:
+                self.current_player = p
+                return
+        # 모든 플레이어의 주사위가 떨어지면 라운드 종료
+        self.end_round(rng)
+
+    def round_payouts(self):
+        n = self.num_players
+        payouts = []
+        for c in range(NUM_CASINOS):
+            dealer = self.dealer_placed[c]
+            counts = self.placed[c * n:(c + 1) * n]
+            contenders = sorted((p for p in range(n) if counts[p] > dealer),
+                                key=lambda p: (-counts[p], self.first_placed[c * n + p]))
+            winners = []
+            for p in contenders:
+                if not winners or counts[winners[-1]] != counts[p]:
+                    winners.append(p)
+            stack = self.casino_money[c]
+            payouts.append([(p, stack[rank] if rank < len(stack) else 0) for rank, p in enumerate(winners)])
+        return payouts
+
+    def end_round(self, rng=DEFAULT_RNG):
+        winnings = {p: [] for p in range(self.num_players)}
+        for c, payout in enumerate(self.round_payouts()):
+            for p, amount in payout:
+                if amount:
+                    self.money[p] += amount
+                    self.card_count[p] += 1
+                winnings[p].append((c + 1, amount))
+
+        n = self.num_players
+        self.placed = bytearray(NUM_CASINOS * n)
+        self.first_placed = bytearray([NOT_PLACED]) * (NUM_CASINOS * n)
+        self.dealer_placed = bytearray(NUM_CASINOS)
+        self.dice = bytearray([self.num_dice]) * n
+        self.dealer_dice = bytearray([self.num_dealer_dice]) * n
+        self.roll = bytearray(6)
+        self.dealer_roll = bytearray(6)
+        self.turn = 0
+        self.current_round += 1
+        self.start_player = (self.start_player + 1) % n
+        self.current_player = self.start_player
+        self.casino_money = deal_money(rng, self.variant.casino_funding) if not self.is_over() else ((),) * NUM_CASINOS
+        return winnings
+
+    def scores(self):
+        return [(self.money[p], self.card_count[p]) for p in range(self.num_players)]
+
+    def get_winner(self):
+        return max(range(self.num_players), key=lambda p: (self.money[p], self.card_count[p]))
+
+    @classmethod
+    def from_game(cls, game):
+        players = game.players
+        n = game.num_players
+        state = cls.__new__(cls)
+        state.variant = game.variant
+        state.num_players = n
+        state.num_dice = game.variant.dice_per_player
+        state.num_dealer_dice = game.variant.dealer_dice
+        state.rounds = game.variant.rounds
+        state.current_round = game.current_round
+        state.start_player = game.start_player
+        state.current_player = game.current_player
+        state.placed = bytearray(NUM_CASINOS * n)
+        state.first_placed = bytearray([NOT_PLACED]) * (NUM_CASINOS * n)
+        state.dealer_placed = bytearray(NUM_CASINOS)
+        turn = 0
+        for c, casino in enumerate(game.casinos):
+            # Casino.dice 의 삽입 순서가 곧 첫 배치 순서다
+            for rank, (player_id, count) in enumerate(casino.dice.items()):
+                state.placed[c * n + player_id] = count
+                state.first_placed[c * n + player_id] = rank
+                turn = max(turn, rank + 1)
+            state.dealer_placed[c] = casino.dealer_dice
+        state.turn = turn
+        state.casino_money = tuple(tuple(casino.money) for casino in game.casinos)
+        state.dice = bytearray(player.dice for player in players)
+        state.dealer_dice = bytearray(player.dealer_dice for player in players)
+        state.money = [player.money for player in players]
+        state.card_count = bytearray(player.card_count for player in players)
+        current = players[game.current_player]
+        state.roll = bytearray(6)
+        state.dealer_roll = bytearray(6)
+        if game.dice_rolled:
+            for face in current.current_roll:
+                state.roll[face - 1] += 1
+            for face in current.current_dealer_roll:
+                state.dealer_roll[face - 1] += 1
+        return state
+
+    def apply_to(self, game):
+        n = self.num_players
+        game.num_players = n
+        game.current_round = self.current_round
+        game.start_player = self.start_player
+        game.current_player = self.current_player
+        for c, casino in enumerate(game.casinos):
+            order = sorted((p for p in range(n) if self.placed[c * n + p]),
+                           key=lambda p: self.first_placed[c * n + p])
+            casino.dice = {p: self.placed[c * n + p] for p in order}
+            casino.money = list(self.casino_money[c])
+            casino.dealer_dice = self.dealer_placed[c]
+        for p, player in enumerate(game.players):
+            player.dice = self.dice[p]
+            player.dealer_dice = self.dealer_dice[p]
+            player.money = self.money[p]
+            player.card_count = self.card_count[p]
+            player.current_roll = []
+            player.current_dealer_roll = []
+        current = game.players[self.current_player]
+        current.current_roll = [face for face in range(1, 7) for _ in range(self.roll[face - 1])]
+        current.current_dealer_roll = [face for face in range(1, 7) for _ in range(self.dealer_roll[face - 1])]
+        game.dice_rolled = self.has_rolled()
+        return game
+
+    def to_game(self, game_cls=VegasGame):
+        return self.apply_to(game_cls(self.num_players, self.variant))
+
+
+def random_playout(state, rng=DEFAULT_RNG):
+    while not state.is_over():
+        if not state.has_rolled():
+            state.roll_dice(rng)
+        state.place_dice(rng.choice(state.legal_faces()), rng)
+    return state
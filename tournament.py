@@ -0,0 +1,229 @@
+import argparse
+import functools
+import importlib
+import json
+import math
+import multiprocessing
+import os
+import time
+from engine import VegasGame, CLASSIC, DEALER
+from mcts import MCTSPlayer
+from odds import placement_hint
+from rng import GameRng, derive_seed
+
+# 여러 전략을 2-5인 VegasGame 테이블에 섞어 앉혀 프로세스 풀에서 대국시키고,
+# 부모 프로세스가 결과를 순서대로 받아 다인 Elo 레이팅을 갱신한다.
+# 게임 i 의 좌석과 주사위는 (seed, i) 로 정해지므로 체크포인트에서 이어 돌려도 같은 대진이 나온다.
+VARIANTS = {"classic": CLASSIC, "dealer": DEALER}
+INITIAL_RATING = 1500.0
+K_FACTOR = 16.0
+
+
+def _faces(game):
+    player = game.players[game.current_player]
+    return sorted(set(player.current_roll) | set(player.current_dealer_roll))
+
+
+def random_policy(game, rng):
+    return rng.choice(_faces(game))
+
+
+def greedy_policy(game, rng):
+    # 가장 많은 주사위를 한 번에 놓고, 같으면 돈이 많은 카지노
+    player = game.players[game.current_player]
+    return max(_faces(game), key=lambda f: (player.current_roll.count(f) + player.current_dealer_roll.count(f),
+                                            sum(game.casinos[f - 1].money)))
+
+
+def hint_policy(game, rng):
+    hints = placement_hint(game)
+    return max(hints, key=hints.get)
+
+
+@functools.lru_cache(maxsize=None)
+def _mcts_player(time_budget):
+    # 프로세스마다 한 번만 만든다
+    return MCTSPlayer(time_budget=time_budget)
+
+
+def mcts_policy(game, rng, time_budget=0.02):
+    player = _mcts_player(time_budget)
+    player.rng = rng
+    return player.choose(game)
+
+
+POLICIES = {"random": random_policy, "greedy": greedy_policy, "hint": hint_policy, "mcts": mcts_policy}
+
+
+def resolve_policy(spec):
+    # "random", "mcts:0.05" (탐색 시간), 또는 사용자 전략 "모듈:함수" — 함수는 (game, rng) -> 카지노 번호
+    if spec in POLICIES:
+        return POLICIES[spec]
+    name, _, arg = spec.partition(":")
+    if name == "mcts" and arg:
+        return functools.partial(mcts_policy, time_budget=float(arg))
+    if not arg:
+        raise ValueError(f"unknown policy: {spec}")
+    return getattr(importlib.import_module(name), arg)
+
+
+def schedule(index, policies, seat_counts, seed):
+    # 게임 번호만으로 좌석 배치를 정한다. 전략이 모두 같은 테이블은 다시 뽑는다
+    rng = GameRng(derive_seed(seed, "seats", index))
+    num_players = rng.choice(seat_counts)
+    while True:
+        seats = [rng.choice(policies) for _ in range(num_players)]
+        if len(set(seats)) > 1:
+            return tuple(seats)
+
+
+_worker_policies = {}
+
+
+def play_game(task):
+    index, seats, variant_name, seed = task
+    rng = GameRng(derive_seed(seed, "game", index))
+    game = VegasGame(len(seats), VARIANTS[variant_name], rng=rng.spawn("engine"))
+    policies = [_worker_policies.get(spec) or _worker_policies.setdefault(spec, resolve_policy(spec))
+                for spec in seats]
+    while not game.is_over():
+        game.play_round()
+        face = policies[game.current_player](game, rng)
+        if not game.place_dice(face):
+            raise ValueError(f"{seats[game.current_player]} chose illegal casino {face}")
+    return index, seats, [(p.money, p.card_count) for p in game.players]
+
+
+class Ratings:
+    def __init__(self, policies):
+        self.rating = {p: INITIAL_RATING for p in policies}
+        self.games = {p: 0 for p in policies}
+        self.wins = {p: 0 for p in policies}
+        # 다른 전략과 일대일로 비교한 점수 합과 횟수 (신뢰 구간용)
+        self.pair_score = {p: 0.0 for p in policies}
+        self.pairs = {p: 0 for p in policies}
+
+    def update(self, seats, scores):
+        # N 인 게임을 좌석 쌍마다의 승/무/패로 나눠 K/(N-1) 로 반영한다
+        n = len(seats)
+        winner = max(range(n), key=lambda i: scores[i])
+        delta = dict.fromkeys(seats, 0.0)
+        for i in range(n):
+            self.games[seats[i]] += 1
+            for j in range(n):
+                if i == j or seats[i] == seats[j]:
+                    continue
+                s = 1.0 if scores[i] > scores[j] else 0.5 if scores[i] == scores[j] else 0.0
+                expected = 1.0 / (1.0 + 10 ** ((self.rating[seats[j]] - self.rating[seats[i]]) / 400))
+                delta[seats[i]] += K_FACTOR / (n - 1) * (s - expected)
+                self.pair_score[seats[i]] += s
+                self.pairs[seats[i]] += 1
+        self.wins[seats[winner]] += 1
+        for policy, d in delta.items():
+            self.rating[policy] += d
+
+    def interval(self, policy):
+        # 일대일 점수율 s 의 표준오차를 Elo 차이로 옮긴 95% 구간 반폭
+        n = self.pairs[policy]
+        if not n:
+            return float("inf")
+        s = min(max(self.pair_score[policy] / n, 1e-3), 1 - 1e-3)
+        return 400 / math.log(10) * 1.96 * math.sqrt(s * (1 - s) / n) / (s * (1 - s))
+
+    def table(self):
+        rows = []
+        for policy in sorted(self.rating, key=self.rating.get, reverse=True):
+            games = self.games[policy]
+            rows.append(f"{policy:>20}  Elo {self.rating[policy]:7.1f} ± {self.interval(policy):5.1f}  "
+                        f"seats {games:6d}  win {self.wins[policy] / games if games else 0:.3f}")
+        return "\n".join(rows)
+
+    def to_dict(self):
+        return {"rating": self.rating, "games": self.games, "wins": self.wins,
+                "pair_score": self.pair_score, "pairs": self.pairs}
+
+    @classmethod
+    def from_dict(cls, data):
+        ratings = cls(data["rating"])
+        for name in ("rating", "games", "wins", "pair_score", "pairs"):
+            getattr(ratings, name).update(data[name])
+        return ratings
+
+
+def save_checkpoint(path, config, games_done, ratings):
+    # 임시 파일에 쓴 뒤 바꿔 끼워서 중간에 죽어도 체크포인트가 깨지지 않는다
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"config": config, "games_done": games_done, "ratings": ratings.to_dict()}, f, indent=1)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path, config):
+    if not path or not os.path.exists(path):
+        return 0, Ratings(config["policies"])
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data["config"] != config:
+        raise ValueError(f"checkpoint {path} was made with different settings")
+    return data["games_done"], Ratings.from_dict(data["ratings"])
+
+
+def run(config, games, workers=None, checkpoint=None, checkpoint_every=500, report=None):
+    if len(set(config["policies"])) < 2:
+        raise ValueError("a tournament needs at least two different policies")
+    games_done, ratings = load_checkpoint(checkpoint, config)
+    tasks = ((i, schedule(i, config["policies"], config["seats"], config["seed"]), config["variant"], config["seed"])
+             for i in range(games_done, games))
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            # imap 은 순서대로 돌려주므로 레이팅 갱신 순서와 체크포인트 위치가 일정하다
+            for index, seats, scores in pool.imap(play_game, tasks, chunksize=8):
+                ratings.update(seats, scores)
+                games_done = index + 1
+                if checkpoint and games_done % checkpoint_every == 0:
+                    save_checkpoint(checkpoint, config, games_done, ratings)
+                if report:
+                    report(games_done, ratings)
+    finally:
+        if checkpoint:
+            save_checkpoint(checkpoint, config, games_done, ratings)
+    return ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="라스베가스 전략 토너먼트")
+    parser.add_argument("policies", nargs="+",
+                        help=f"전략 이름 ({', '.join(POLICIES)}, mcts:초) 또는 모듈:함수")
+    parser.add_argument("--games", type=int, default=1000, help="전체 게임 수 (이어 돌릴 때도 총합)")
+    parser.add_argument("--seats", type=int, nargs="+", default=[2, 3, 4, 5])
+    parser.add_argument("--variant", choices=list(VARIANTS), default="dealer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="기본값은 CPU 코어 수")
+    parser.add_argument("--checkpoint", help="레이팅을 저장하고 이어 돌릴 JSON 파일")
+    parser.add_argument("--checkpoint-every", type=int, default=500)
+    args = parser.parse_args()
+
+    if any(not 2 <= n <= 5 for n in args.seats):
+        parser.error("--seats must be between 2 and 5")
+    if len(set(args.policies)) < 2:
+        parser.error("at least two different policies are needed")  # 한 전략만으로는 섞인 테이블을 뽑을 수 없다
+    for spec in args.policies:
+        resolve_policy(spec)  # 잘못된 이름은 워커를 띄우기 전에 알린다
+    config = {"policies": sorted(set(args.policies)), "seats": args.seats, "variant": args.variant, "seed": args.seed}
+    start = time.perf_counter()
+    last = [start]
+
+    def report(done, ratings):
+        now = time.perf_counter()
+        if now - last[0] >= 5 or done == args.games:
+            last[0] = now
+            print(f"\n{done}/{args.games} games ({now - start:.0f}s)\n{ratings.table()}", flush=True)
+
+    try:
+        run(config, args.games, args.workers, args.checkpoint, args.checkpoint_every, report)
+    except KeyboardInterrupt:
+        print("\n중단됨" + (f" — {args.checkpoint} 에서 이어 돌릴 수 있다" if args.checkpoint else ""))
+
+
+if __name__ == "__main__":
+    main()
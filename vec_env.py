@@ -0,0 +1,153 @@
+import argparse
+import time
+import numpy as np
+from batch_sim import BatchVegas, NUM_CASINOS, random_policy, greedy_policy
+from engine import CLASSIC, DEALER
+
+# BatchVegas 위에 올린 Gymnasium 식 벡터 환경. 테이블 B 개에서 학습자 한 명씩이 두고,
+# 나머지 좌석은 opponent 정책이 학습자 차례가 올 때까지 둔다.
+# 관측, 행동 마스크, 보상은 만들 때 한 번 할당한 배열에 매 step 덮어써서 돌려준다.
+# 돌려받은 배열을 다음 step 뒤에도 쓰려면 복사해야 한다.
+# 게임이 끝난 테이블은 같은 step 안에서 새 게임으로 바뀌고 (terminated=True), 관측은 새 게임의 첫 차례다.
+# 끝난 게임의 결과는 info["final_money"], info["won"] 에 남는다.
+NUM_ACTIONS = NUM_CASINOS
+MONEY_SCALE = 100000.0
+OBS = {  # 관측 벡터의 구간
+    "roll": slice(0, 6),            # 굴린 일반 주사위 눈별 개수
+    "dealer_roll": slice(6, 12),    # 굴린 딜러 주사위 눈별 개수
+    "own": slice(12, 18),           # 카지노별로 내가 놓은 주사위
+    "rival": slice(18, 24),         # 카지노별로 상대 중 가장 많이 놓은 주사위
+    "dealer": slice(24, 30),        # 카지노별 딜러 주사위
+    "top_card": slice(30, 36),      # 카지노별 1등 상금
+    "second_card": slice(36, 42),   # 카지노별 2등 상금
+    "dice_left": slice(42, 43),
+    "dealer_dice_left": slice(43, 44),
+    "round": slice(44, 45),
+    "lead": slice(45, 46),          # 내 돈 - 상대 중 가장 많은 돈
+}
+OBS_SIZE = 46
+
+
+class VegasVecEnv:
+    def __init__(self, num_envs, num_players=4, variant=DEALER, opponent=random_policy, seed=None):
+        self.num_envs = num_envs
+        self.num_players = num_players
+        self.opponent = opponent
+        self.sim = BatchVegas(num_envs, num_players, variant, seed=seed)
+        self.all = np.arange(num_envs)
+        self.seat = np.zeros(num_envs, dtype=np.intp)
+        self.is_seat = np.zeros((num_envs, num_players), dtype=bool)
+        self.roll = np.zeros((num_envs, NUM_CASINOS), dtype=np.int16)
+        self.dealer_roll = np.zeros((num_envs, NUM_CASINOS), dtype=np.int16)
+        self.obs = np.zeros((num_envs, OBS_SIZE), dtype=np.float32)
+        self.action_mask = np.zeros((num_envs, NUM_ACTIONS), dtype=bool)
+        self.reward = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)  # 게임은 항상 끝나므로 늘 False
+        self.info = {"action_mask": self.action_mask,
+                     "final_money": np.zeros(num_envs, dtype=np.int64),
+                     "won": np.zeros(num_envs, dtype=bool)}
+        dice = max(self.sim.num_dice, 1)
+        self.scale = {"roll": 1.0 / dice, "dealer_roll": 1.0 / max(self.sim.num_dealer_dice, 1),
+                      "own": 1.0 / dice, "rival": 1.0 / dice, "dealer": 1.0 / dice}
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.sim.rng = np.random.default_rng(seed)
+        self.sim.reset()
+        self.terminated[:] = False
+        self.reward[:] = 0.0
+        self.begin(self.all)
+        self.observe()
+        return self.obs, self.info
+
+    def begin(self, envs):
+        # 새 게임마다 학습자 좌석을 다시 뽑고 학습자 차례까지 진행한 뒤 굴린다
+        self.seat[envs] = self.sim.rng.integers(0, self.num_players, envs.size)
+        self.is_seat[envs] = np.arange(self.num_players) == self.seat[envs, None]
+        self.advance(envs)
+
+    def advance(self, envs):
+        sim = self.sim
+        while True:
+            waiting = envs[(sim.current_player[envs] != self.seat[envs]) & ~sim.done[envs]]
+            if not waiting.size:
+                break
+            sim.play(waiting, self.opponent)
+
+    def step(self, actions):
+        sim = self.sim
+        faces = np.asarray(actions, dtype=np.intp)
+        if not self.action_mask[self.all, faces].all():
+            raise ValueError("action chose a face that was not rolled")
+        sim.place(self.all, faces, self.roll, self.dealer_roll)
+        self.advance(self.all)
+
+        np.copyto(self.terminated, sim.done)
+        self.reward[:] = 0.0
+        ended = np.flatnonzero(sim.done)
+        if ended.size:
+            won = sim.winners()[ended] == self.seat[ended]
+            self.reward[ended] = won
+            self.info["won"][ended] = won
+            self.info["final_money"][ended] = sim.money[ended, self.seat[ended]]
+            sim.restart(ended)
+            self.begin(ended)
+        self.observe()
+        return self.obs, self.reward, self.terminated, self.truncated, self.info
+
+    def observe(self):
+        sim, obs, rows, seat = self.sim, self.obs, self.all, self.seat
+        self.roll[:], self.dealer_roll[:] = sim.roll(rows)
+        np.greater(self.roll + self.dealer_roll, 0, out=self.action_mask)
+
+        own = sim.placed[rows, seat]
+        rival = np.where(self.is_seat[:, :, None], -1, sim.placed).max(1)
+        np.multiply(self.roll, self.scale["roll"], out=obs[:, OBS["roll"]])
+        np.multiply(self.dealer_roll, self.scale["dealer_roll"], out=obs[:, OBS["dealer_roll"]])
+        np.multiply(own, self.scale["own"], out=obs[:, OBS["own"]])
+        np.multiply(rival, self.scale["rival"], out=obs[:, OBS["rival"]])
+        np.multiply(sim.dealer_placed, self.scale["dealer"], out=obs[:, OBS["dealer"]])
+        # 카지노 돈은 큰 지폐부터 정렬돼 있다
+        np.multiply(sim.casino_money[:, :, 0], 1 / MONEY_SCALE, out=obs[:, OBS["top_card"]])
+        np.multiply(sim.casino_money[:, :, 1], 1 / MONEY_SCALE, out=obs[:, OBS["second_card"]])
+        obs[:, OBS["dice_left"]] = sim.dice[rows, seat, None] * self.scale["own"]
+        obs[:, OBS["dealer_dice_left"]] = sim.dealer_dice[rows, seat, None] * self.scale["dealer_roll"]
+        obs[:, OBS["round"]] = sim.current_round[:, None] / sim.rounds
+        money = sim.money[rows, seat]
+        best_rival = np.where(self.is_seat, -1, sim.money).max(1)
+        obs[:, OBS["lead"]] = ((money - best_rival) / MONEY_SCALE)[:, None]
+
+
+def random_actions(env):
+    scores = env.sim.rng.random(env.action_mask.shape, dtype=np.float32)
+    return np.where(env.action_mask, scores, -1.0).argmax(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="라스베가스 벡터 환경 속도 측정 (무작위 행동)")
+    parser.add_argument("--envs", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--no-dealer", action="store_true")
+    parser.add_argument("--opponent", choices=["random", "greedy"], default="random")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    opponent = greedy_policy if args.opponent == "greedy" else random_policy
+    env = VegasVecEnv(args.envs, args.players, CLASSIC if args.no_dealer else DEALER, opponent, args.seed)
+    env.reset()
+    games = wins = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, reward, terminated, _, _ = env.step(random_actions(env))
+        games += terminated.sum()
+        wins += reward.sum()
+    elapsed = time.perf_counter() - start
+    steps = args.envs * args.steps
+    print(f"{steps:,} steps in {elapsed:.2f}s ({steps / elapsed:,.0f} steps/s), "
+          f"{games:,} games, learner win {wins / max(games, 1):.3f}")
+
+
+if __name__ == "__main__":
+    main()
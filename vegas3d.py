@@ -1,14 +1,201 @@
+import argparse
+import time
+from collections import deque
 import pygame
 from pygame.math import Vector3
 from OpenGL.GL import *
 from OpenGL.GLU import *
-from OpenGL.GLUT import *
+from OpenGL.arrays import vbo
 import random
 import numpy as np
-from main import VegasGame, Player, Casino
+from engine import VegasGame, Player, Casino, CLASSIC
+from mcts import MCTSPlayer
+from history import History
+import metrics
+
+# 애니메이션은 화면 갱신과 상관없이 고정된 시간 간격으로 진행한다
+SIM_STEP = 1 / 60
+ROLL_STEPS = 30  # 굴리기 애니메이션 길이 (0.5초)
+MAX_CATCH_UP = 4  # 한 프레임에 따라잡는 최대 애니메이션 단계
+REDRAW_EVENTS = {pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSHOWN, pygame.WINDOWRESTORED,
+                 pygame.WINDOWSIZECHANGED}
+
+
+def instance_matrix(position, scale):
+    # glMultMatrixf 용 4x4 행렬 (OpenGL 은 열 우선이라 이동량이 마지막 행에 들어간다)
+    m = np.diag([scale[0], scale[1], scale[2], 1.0]).astype(np.float32)
+    m[3, :3] = position
+    return m
+
+
+class CubeRenderer:
+    # 정육면체의 면(GL_QUADS)과 모서리(GL_LINES)를 VBO 에 한 번만 올려 두고,
+    # 인스턴스마다 변환 행렬과 색만 바꿔 glDrawArrays 두 번으로 그린다.
+    VERTICES = np.array([
+        [1, 1, 1], [-1, 1, 1], [-1, -1, 1], [1, -1, 1],
+        [1, 1, -1], [-1, 1, -1], [-1, -1, -1], [1, -1, -1]
+    ], dtype=np.float32)
+    EDGES = [
+        (0,1), (1,2), (2,3), (3,0),
+        (4,5), (5,6), (6,7), (7,4),
+        (0,4), (1,5), (2,6), (3,7)
+    ]
+    FACES = [
+        (0,1,2,3), (4,5,6,7), (0,3,7,4), (1,2,6,5),
+        (0,1,5,4), (2,3,7,6)
+    ]
 
-class Vegas3D:
     def __init__(self):
+        quads = self.VERTICES[np.array(self.FACES).ravel()]
+        lines = self.VERTICES[np.array(self.EDGES).ravel()]
+        self.quad_count = len(quads)
+        self.line_count = len(lines)
+        self.buffer = vbo.VBO(np.ascontiguousarray(np.concatenate([quads, lines])))
+
+    def begin(self):
+        self.buffer.bind()
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, self.buffer)
+
+    def draw(self, matrix, color):
+        glPushMatrix()
+        glMultMatrixf(matrix)
+        glColor3fv(color)
+        glDrawArrays(GL_QUADS, 0, self.quad_count)
+        glColor3f(0, 0, 0)
+        glDrawArrays(GL_LINES, self.quad_count, self.line_count)
+        glPopMatrix()
+
+    def end(self):
+        glDisableClientState(GL_VERTEX_ARRAY)
+        self.buffer.unbind()
+
+
+class TextRenderer:
+    # 인쇄 가능한 ASCII 글자를 pygame.font 로 텍스처 하나(아틀라스)에 한 번 그려 두고,
+    # 라벨마다 글자 사각형 메시를 만들어 둔다. 문자열이 바뀐 라벨만 메시를 다시 만들고
+    # 모든 라벨을 한 VBO 에 모아 프레임마다 glDrawArrays 한 번으로 그린다.
+    CHARS = "".join(chr(c) for c in range(32, 127))
+    ATLAS_WIDTH = 512
+
+    def __init__(self, font, viewport):
+        self.viewport = viewport
+        self.ascent = font.get_ascent()
+        glyphs = [font.render(ch, True, (255, 255, 255)) for ch in self.CHARS]
+        height = max(g.get_height() for g in glyphs)
+        positions = []
+        x = y = 0
+        for glyph in glyphs:
+            if x + glyph.get_width() > self.ATLAS_WIDTH:
+                x, y = 0, y + height
+            positions.append((x, y))
+            x += glyph.get_width()
+        atlas_height = y + height
+        atlas = pygame.Surface((self.ATLAS_WIDTH, atlas_height), pygame.SRCALPHA)
+        # 글자 -> (너비, 높이, u0, v0, u1, v1). v 는 위쪽이 0
+        self.glyphs = {}
+        for ch, glyph, (gx, gy) in zip(self.CHARS, glyphs, positions):
+            atlas.blit(glyph, (gx, gy), special_flags=pygame.BLEND_RGBA_MAX)
+            w, h = glyph.get_size()
+            self.glyphs[ch] = (w, h, gx / self.ATLAS_WIDTH, gy / atlas_height,
+                               (gx + w) / self.ATLAS_WIDTH, (gy + h) / atlas_height)
+
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.ATLAS_WIDTH, atlas_height, 0, GL_RGBA, GL_UNSIGNED_BYTE,
+                     pygame.image.tostring(atlas, "RGBA"))
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        self.labels = {}  # 월드 위치 -> (문자열, 화면 위치, 정점 배열)
+        self.touched = set()
+        self.dirty = False
+        self.buffer = None
+        self.count = 0
+
+    def layout(self, text, sx, sy):
+        # 글자마다 사각형 하나: (x, y, u, v) * 4
+        quads = []
+        pen = sx
+        for ch in text:
+            w, h, u0, v0, u1, v1 = self.glyphs.get(ch, self.glyphs["?"])
+            top = sy + self.ascent
+            bottom = top - h
+            quads.extend(((pen, bottom, u0, v1), (pen + w, bottom, u1, v1),
+                          (pen + w, top, u1, v0), (pen, top, u0, v0)))
+            pen += w
+        return np.array(quads, dtype=np.float32).reshape(-1, 4)
+
+    def add(self, text, x, y, z):
+        key = (x, y, z)
+        self.touched.add(key)
+        label = self.labels.get(key)
+        if label is not None and label[0] == text:
+            return
+        # 카메라가 고정돼 있어 화면 위치는 라벨을 처음 만들 때 한 번만 구한다
+        screen = label[1] if label is not None else gluProject(x, y, z)[:2]
+        self.labels[key] = (text, screen, self.layout(text, *screen))
+        self.dirty = True
+
+    def draw(self):
+        # 이번 프레임에 add() 되지 않은 라벨은 지운다
+        stale = self.labels.keys() - self.touched
+        for key in stale:
+            del self.labels[key]
+        self.touched = set()
+        if stale or self.dirty:
+            self.dirty = False
+            meshes = [mesh for _, _, mesh in self.labels.values() if len(mesh)]
+            data = np.ascontiguousarray(np.concatenate(meshes)) if meshes else np.zeros((4, 4), np.float32)
+            self.count = len(data) if meshes else 0
+            if self.buffer is None:
+                self.buffer = vbo.VBO(data)
+            else:
+                self.buffer.set_array(data)
+        if not self.count:
+            return
+
+        width, height = self.viewport
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, width, 0, height, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        glPushAttrib(GL_ENABLE_BIT)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_TEXTURE_2D)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glColor3f(1, 1, 1)  # 흰색 텍스트
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        self.buffer.bind()
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 16, self.buffer)
+        glTexCoordPointer(2, GL_FLOAT, 16, self.buffer + 8)
+        glDrawArrays(GL_QUADS, 0, self.count)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        self.buffer.unbind()
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glPopAttrib()
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+
+    def delete(self):
+        if self.buffer is not None:
+            self.buffer.delete()
+        glDeleteTextures([self.texture])
+
+
+class Vegas3D:
+    def __init__(self, ai_players=()):
         pygame.init()
         self.display = (1024, 768)
         pygame.display.set_mode(self.display, pygame.DOUBLEBUF | pygame.OPENGL)
@@ -27,13 +214,23 @@ class Vegas3D:
         self.reshape(*self.display)
         glTranslatef(0.0, 0.0, -20)
 
-        self.game = VegasGame(2)  # 2명의 플레이어로 게임 시작
+        self.game = VegasGame(2, CLASSIC)  # 2명의 플레이어로 게임 시작
+        self.history = History(self.game)
+        self.ai_players = set(ai_players)
+        self.ai = MCTSPlayer(time_budget=0.2)
         self.setup_3d_objects()
-        self.font = pygame.font.Font(None, 36)
+        self.font = pygame.font.Font(None, 24)
+        self.text = TextRenderer(self.font, self.display)
         self.dice_rotation = 0
         self.rolling = False
         self.roll_frames = 0
         self.dice_results = []
+        self.frame_times = deque(maxlen=240)
+        self.caption_time = time.perf_counter()
+        self.frames = 0
+        self.frame_time_total = 0.0
+        self.started = time.perf_counter()
+        self.needs_redraw = True
 
     def reshape(self, width, height):
         glViewport(0, 0, width, height)
@@ -53,44 +250,18 @@ class Vegas3D:
             (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0),
             (1.0, 1.0, 0.0), (1.0, 0.0, 1.0), (0.0, 1.0, 1.0)
         ]
-
-    def draw_complex_cube(self):
-        vertices = [
-            [1, 1, 1], [-1, 1, 1], [-1, -1, 1], [1, -1, 1],
-            [1, 1, -1], [-1, 1, -1], [-1, -1, -1], [1, -1, -1]
-        ]
-        edges = [
-            (0,1), (1,2), (2,3), (3,0),
-            (4,5), (5,6), (6,7), (7,4),
-            (0,4), (1,5), (2,6), (3,7)
-        ]
-        faces = [
-            (0,1,2,3), (4,5,6,7), (0,3,7,4), (1,2,6,5),
-            (0,1,5,4), (2,3,7,6)
-        ]
-
-        glBegin(GL_QUADS)
-        for face in faces:
-            for vertex in face:
-                glVertex3fv(vertices[vertex])
-        glEnd()
-
-        glColor3f(0, 0, 0)
-        glBegin(GL_LINES)
-        for edge in edges:
-            for vertex in edge:
-                glVertex3fv(vertices[vertex])
-        glEnd()
+        self.cube = CubeRenderer()
+        self.casino_matrices = [instance_matrix(pos, (1.0, 1.0, 0.5)) for pos in self.casino_positions]
+        self.dice_matrices = [instance_matrix(pos, (0.5, 0.5, 0.5)) for pos in self.dice_positions]
+        self.dice_scale = instance_matrix((0, 0, 0), (0.5, 0.5, 0.5))
 
     def draw_casinos(self):
-        for i, pos in enumerate(self.casino_positions):
-            glPushMatrix()
-            glTranslatef(*pos)
-            glScalef(1.0, 1.0, 0.5)
-            glColor3fv(self.casino_colors[i])
-            self.draw_complex_cube()
-            glPopMatrix()
+        self.cube.begin()
+        for i, matrix in enumerate(self.casino_matrices):
+            self.cube.draw(matrix, self.casino_colors[i])
+        self.cube.end()
 
+        for i, pos in enumerate(self.casino_positions):
             self.render_text(f"Casino {i+1}", pos[0], pos[1]+1.5, pos[2])
             money = sum(self.game.casinos[i].money)
             self.render_text(f"${money}", pos[0], pos[1]-1.5, pos[2])
@@ -99,16 +270,20 @@ class Vegas3D:
             self.render_text(dice_str, pos[0], pos[1]-2, pos[2])
 
     def draw_dice(self):
+        self.cube.begin()
         for i, pos in enumerate(self.dice_positions):
-            glPushMatrix()
-            glTranslatef(*pos)
             if self.rolling and i == self.game.current_player:
+                # 굴리는 중인 주사위만 회전이 들어가므로 고정 행렬 대신 직접 변환한다
+                glPushMatrix()
+                glTranslatef(*pos)
                 glRotatef(self.dice_rotation, 1, 1, 1)
-            glScalef(0.5, 0.5, 0.5)
-            glColor3f(1.0, 1.0, 1.0)
-            self.draw_complex_cube()
-            glPopMatrix()
+                self.cube.draw(self.dice_scale, (1.0, 1.0, 1.0))
+                glPopMatrix()
+            else:
+                self.cube.draw(self.dice_matrices[i], (1.0, 1.0, 1.0))
+        self.cube.end()
 
+        for i, pos in enumerate(self.dice_positions):
             player = self.game.players[i]
             self.render_text(f"Player {i+1}: ${player.money}", pos[0], pos[1]-1, pos[2])
             if player.current_roll:
@@ -117,14 +292,10 @@ class Vegas3D:
             self.render_text(f"Dice left: {player.dice}", pos[0], pos[1]-2, pos[2])
 
     def render_text(self, text, x, y, z):
-        glDisable(GL_LIGHTING)
-        glColor3f(1, 1, 1)  # 흰색 텍스트
-        glRasterPos3f(x, y, z)
-        for char in text:
-            glutBitmapCharacter(GLUT_BITMAP_HELVETICA_18, ord(char))
-        glEnable(GL_LIGHTING)
+        self.text.add(text, x, y, z)  # 실제로는 draw_scene 끝에서 한 번에 그린다
 
     def draw_scene(self):
+        start = time.perf_counter()
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glLoadIdentity()
         glTranslatef(0.0, 0.0, -20)
@@ -143,64 +314,179 @@ class Vegas3D:
             for i, result in enumerate(self.dice_results):
                 self.render_text(f"{i+1}: {result}", -5, 6.5 + i*0.5, 0)
 
+        self.text.draw()
         pygame.display.flip()
+        self.needs_redraw = False
+        self.count_frame(time.perf_counter() - start)
+
+    def count_frame(self, seconds):
+        # 최근 프레임의 평균 시간을 1초마다 창 제목에 보여 준다
+        self.frames += 1
+        self.frame_time_total += seconds
+        self.frame_times.append(seconds)
+        now = time.perf_counter()
+        if now - self.caption_time >= 1.0:
+            self.caption_time = now
+            average = sum(self.frame_times) / len(self.frame_times)
+            pygame.display.set_caption(f"Las Vegas 3D - {average * 1000:.2f} ms/frame")
+
+    def frame_report(self):
+        recent = sorted(self.frame_times)
+        elapsed = time.perf_counter() - self.started
+        if not recent:
+            return "no frames drawn"
+        return (f"{self.frames} frames in {elapsed:.1f}s ({self.frames / elapsed:.1f} fps), "
+                f"mean {self.frame_time_total / self.frames * 1000:.2f} ms, "
+                f"recent p50 {recent[len(recent) // 2] * 1000:.2f} ms, "
+                f"p99 {recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000:.2f} ms, "
+                f"max {recent[-1] * 1000:.2f} ms")
 
-    def handle_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                quit()
-            elif event.type == pygame.KEYDOWN:
+    def handle_events(self, events):
+        for event in events:
+            if event.type in REDRAW_EVENTS:
+                self.needs_redraw = True
+            elif event.type == pygame.QUIT:
+                self.shutdown()
+            elif event.type == pygame.KEYDOWN and self.game.current_player not in self.ai_players:
                 if event.key == pygame.K_SPACE:
                     self.roll_dice()
                 elif event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6]:
                     self.place_dice(int(pygame.key.name(event.key)))
+                elif event.key in (pygame.K_z, pygame.K_BACKSPACE):
+                    self.undo()
+                elif event.key == pygame.K_y:
+                    self.redo()
 
     def roll_dice(self):
-        if not self.rolling and self.game.play_round():
+        if not self.rolling and self.history.play_round():
             self.rolling = True
             self.roll_frames = 0
             self.dice_results = self.game.players[self.game.current_player].current_roll
+            self.needs_redraw = True
 
     def animate_roll(self):
+        # SIM_STEP 마다 한 번씩 불린다
         if self.rolling:
             self.dice_rotation += 10
             self.roll_frames += 1
-            if self.roll_frames >= 30:  # 30 프레임 동안 회전
+            self.needs_redraw = True
+            if self.roll_frames >= ROLL_STEPS:
                 self.rolling = False
                 self.dice_rotation = 0
                 print(f"Player {self.game.current_player + 1} rolled: {self.dice_results}")
 
+    def update_ai(self):
+        if self.rolling or self.game.current_player not in self.ai_players:
+            return
+        if not self.dice_results:
+            self.roll_dice()
+        else:
+            face = self.ai.choose(self.game)
+            stats = self.ai.last_stats
+            if stats.get("endgame"):
+                print(f"AI endgame: {stats['nodes']} nodes ({stats['nodes_per_sec']:.0f}/s, "
+                      f"table hit rate {stats['hit_rate']:.0%})")
+            else:
+                print(f"AI search: {stats['playouts']} playouts ({stats['playouts_per_sec']:.0f}/s)")
+            self.place_dice(face)
+
     def place_dice(self, casino_index):
-        if self.game.place_dice(casino_index):
-            print(f"Player {self.game.current_player + 1} placed dice in Casino {casino_index}")
+        player_id = self.game.current_player
+        round_before = self.game.current_round
+        if self.history.place_dice(casino_index):
+            print(f"Player {player_id + 1} placed dice in Casino {casino_index}")
             self.dice_results = []  # 주사위 결과 초기화
-            if all(player.dice == 0 for player in self.game.players):
+            self.needs_redraw = True
+            # 마지막 주사위가 놓이면 엔진이 라운드를 정산한다
+            if self.game.current_round != round_before:
                 self.end_round()
 
+    def undo(self):
+        # AI 가 둔 수는 사람 차례가 될 때까지 함께 되돌린다. 굴린 주사위는 그대로 남는다
+        if self.rolling or not self.history.can_undo():
+            return
+        while self.history.undo() is not None and self.game.current_player in self.ai_players:
+            pass
+        print(f"Undo: Player {self.game.current_player + 1} to move")
+        self.after_jump()
+
+    def redo(self):
+        if self.rolling or not self.history.can_redo():
+            return
+        round_before = self.game.current_round
+        while self.history.redo() is not None and self.game.current_player in self.ai_players \
+                and self.history.can_redo():
+            pass
+        print(f"Redo: Player {self.game.current_player + 1} to move")
+        self.after_jump()
+        if self.game.current_round != round_before:
+            self.end_round()
+
+    def after_jump(self):
+        self.dice_results = self.game.players[self.game.current_player].current_roll
+        self.needs_redraw = True
+
     def end_round(self):
-        winnings = self.game.end_round()
+        winnings = self.game.last_winnings
         print(f"Round {self.game.current_round - 1} ended")
         for player_id, player_winnings in winnings.items():
             print(f"Player {player_id + 1} winnings:")
             for casino_number, amount in player_winnings:
                 if amount > 0:
                     print(f"  Casino {casino_number}: ${amount}")
-        if self.game.current_round > 4:
+        if self.game.is_over():
             self.end_game()
 
     def end_game(self):
         winner = self.game.get_winner()
         print(f"Game Over! Winner: Player {winner.id + 1} (${winner.money}, {winner.card_count} cards)")
+        self.shutdown()
+
+    def shutdown(self):
+        print(self.frame_report())
+        # GL 컨텍스트가 살아 있을 때 VBO 를 지운다
+        self.cube.buffer.delete()
+        self.text.delete()
         pygame.quit()
         quit()
 
+    def ai_turn(self):
+        return not self.game.is_over() and self.game.current_player in self.ai_players
+
     def run(self):
+        # 바뀐 것이 있을 때만 다시 그리고, 할 일이 없으면 다음 입력이 올 때까지 잠든다
+        previous = time.perf_counter()
+        lag = 0.0
         while True:
-            self.handle_events()
-            self.animate_roll()
-            self.draw_scene()
-            pygame.time.wait(10)
+            was_rolling = self.rolling
+            if not (self.rolling or self.needs_redraw or self.ai_turn()):
+                self.handle_events([pygame.event.wait()])
+            self.handle_events(pygame.event.get())
+
+            now = time.perf_counter()
+            if self.rolling and not was_rolling:
+                lag = 0.0  # 잠들어 있던 시간이나 굴리기 전 시간은 애니메이션에 넣지 않는다
+            elif self.rolling:
+                # 한 프레임이 오래 걸려도 몇 단계만 따라잡아 굴림이 한 번에 끝나지 않게 한다
+                lag = min(lag + now - previous, MAX_CATCH_UP * SIM_STEP)
+                while self.rolling and lag >= SIM_STEP:
+                    self.animate_roll()
+                    lag -= SIM_STEP
+            else:
+                lag = 0.0
+            previous = now
+
+            self.update_ai()
+            if self.needs_redraw:
+                self.draw_scene()
+            elif self.rolling:
+                pygame.time.wait(max(1, int((SIM_STEP - lag) * 1000)))  # 다음 애니메이션 단계까지
+
+metrics.instrument(Vegas3D, "draw_scene", "pygame_frame")
 
 if __name__ == "__main__":
-    Vegas3D().run()
\ No newline at end of file
+    metrics.setup()
+    parser = argparse.ArgumentParser(description="Las Vegas 3D")
+    parser.add_argument("--ai", type=int, nargs="*", default=[], help="AI 가 맡을 플레이어 번호 (1, 2)")
+    args = parser.parse_args()
+    Vegas3D(ai_players=[p - 1 for p in args.ai]).run()
\ No newline at end of file
@@ -0,0 +1,108 @@
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from rng import GameRng
+from state import GameState, random_playout
+
+# 현재 판에서 끝까지 무작위로 둔 결과로 플레이어별 승률을 추정한다.
+# 시뮬레이션은 BATCH 판씩 워커 프로세스에 맡기고, 끝난 묶음마다 결과를 더해 추정치가 점점 정확해진다.
+# 결과는 state_hash() 로 저장해 같은 판에서 다시 실행하면 바로 돌려주고,
+# 판이 바뀌면 아직 시작하지 않은 예전 판의 묶음은 취소한다.
+BATCH = 200
+TARGET = 4000  # 판마다 이만큼 모이면 멈춘다 (표준오차 1% 미만)
+MAX_CACHED = 256
+
+
+def simulate(state, count, seed):
+    # 워커에서 실행된다. 플레이어별 승리 횟수
+    rng = GameRng(seed)
+    wins = [0] * state.num_players
+    for _ in range(count):
+        wins[random_playout(state.clone(), rng).get_winner()] += 1
+    return wins
+
+
+def process_pool(workers=2):
+    # Windows 와 같은 spawn 방식으로 띄워 Streamlit 의 스레드가 있는 프로세스를 fork 하지 않는다
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class Estimate:
+    __slots__ = ("state", "wins", "playouts", "pending")
+
+    def __init__(self, state):
+        self.state = state
+        self.wins = [0] * state.num_players
+        self.playouts = 0
+        self.pending = 0
+
+    def probabilities(self):
+        return [w / self.playouts for w in self.wins] if self.playouts else None
+
+
+class WinRateEstimator:
+    # executor 는 여러 세션이 함께 써도 되고, 취소와 캐시는 추정기마다 따로다
+    def __init__(self, executor, workers=2, batch=BATCH, target=TARGET):
+        self.executor = executor
+        self.workers = workers
+        self.batch = batch
+        self.target = target
+        self.rng = GameRng()
+        self.results = OrderedDict()
+        self.focus = None
+        self.futures = set()
+        # cancel() 한 future 의 콜백은 같은 스레드에서 바로 불리므로 재진입 가능한 잠금을 쓴다
+        self.lock = threading.RLock()
+
+    def estimate(self, game):
+        # (플레이어별 승률 또는 None, 시뮬레이션 수) 를 바로 돌려주고 모자라면 뒤에서 더 돌린다
+        state = game if isinstance(game, GameState) else GameState.from_game(game)
+        key = state.state_hash()
+        with self.lock:
+            if key != self.focus:
+                self.focus = key
+                for future in list(self.futures):
+                    future.cancel()  # 이미 돌고 있는 묶음은 끝까지 가서 제 판의 캐시에 들어간다
+            est = self.results.get(key)
+            if est is None:
+                est = self.results[key] = Estimate(state)
+                while len(self.results) > MAX_CACHED:
+                    self.results.popitem(last=False)
+            self.results.move_to_end(key)
+            self.fill(key, est)
+            return est.probabilities(), est.playouts
+
+    def busy(self):
+        # 지금 판의 묶음이 아직 돌고 있는지
+        with self.lock:
+            est = self.results.get(self.focus)
+            return est is not None and est.pending > 0
+
+    def fill(self, key, est):
+        while est.pending < self.workers and est.playouts + est.pending * self.batch < self.target:
+            try:
+                future = self.executor.submit(simulate, est.state, self.batch, self.rng.getrandbits(64))
+            except RuntimeError:
+                return  # 풀이 이미 닫혔다 (종료 중)
+            est.pending += 1
+            self.futures.add(future)
+            future.add_done_callback(lambda f, key=key, est=est: self.collect(key, est, f))
+
+    def collect(self, key, est, future):
+        with self.lock:
+            self.futures.discard(future)
+            est.pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                return
+            for p, wins in enumerate(future.result()):
+                est.wins[p] += wins
+            est.playouts += self.batch
+            if key == self.focus:
+                self.fill(key, est)
+
+    def cancel(self):
+        with self.lock:
+            self.focus = None
+            for future in list(self.futures):
+                future.cancel()